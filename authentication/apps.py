@@ -2,7 +2,13 @@
 
 from django.apps import AppConfig
 
+from common.serializers import compile_serializers
+
 
 class AuthConfig(AppConfig):  # noqa
     default_auto_field = "django.db.models.BigAutoField"
     name = "authentication"
+
+    def ready(self):
+        """Compile the app's model serializers."""
+        compile_serializers(self.get_models())
@@ -0,0 +1,45 @@
+"""Management command to backfill the phonetic keys of users."""
+
+from django.core.management.base import BaseCommand
+
+from authentication.models import User
+from common.middleware import require_service
+from common.phonetics import phonetic_keys
+
+
+class Command(BaseCommand):
+    """Management command to backfill the phonetic keys of users."""
+
+    help = "Recomputes the phonetic keys (used by fuzzy searches) of users in batches"
+
+    def add_arguments(self, parser) -> None:
+        """Add arguments to management command."""
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Users updated per query"
+        )
+
+    @require_service("AUTH")
+    def handle(self, *args, **kwargs):
+        """Process the command."""
+        batch_size = kwargs["batch_size"]
+        users = User.objects.order_by("uuid").only(
+            "uuid", "first_name", "last_name", "phonetic_keys"
+        )
+        updated, last = 0, None
+        while True:
+            # keyset batches, so each one is an index range scan
+            batch = list((users if last is None else users.filter(uuid__gt=last))[:batch_size])
+            if not batch:
+                break
+            last = batch[-1].uuid
+            changed = []
+            for user in batch:
+                keys = phonetic_keys(user.first_name, user.last_name)
+                if keys != user.phonetic_keys:
+                    user.phonetic_keys = keys
+                    changed.append(user)
+            User.objects.bulk_update(changed, ["phonetic_keys"])
+            updated += len(changed)
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated the phonetic keys of {updated} users.")
+        )
@@ -0,0 +1,67 @@
+"""Management command to benchmark the cost of signing & verifying JWTs."""
+
+import time
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from django.core.management.base import BaseCommand
+
+from common.keyring import key_algorithm
+
+CLAIMS = {
+    "sub": "c8db9bda-c4cb-4c8e-a343-d19ea17f4875",
+    "iat": 1666000000,
+    "exp": 1697536000,
+    "roles": "PATIENT PRACTITIONER PHYSICIAN",
+}
+
+# label -> function generating a private key
+KEYS = {
+    "RS384 (RSA 4096)": lambda: rsa.generate_private_key(65537, 4096),
+    "RS384 (RSA 2048)": lambda: rsa.generate_private_key(65537, 2048),
+    "ES256 (P-256)": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA (Ed25519)": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def ops_per_second(fn, seconds):
+    """Return the number of times *fn* runs per second (run for about *seconds*)."""
+    count, start = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        fn()
+        count += 1
+    return count / elapsed
+
+
+class Command(BaseCommand):
+    """Management command to benchmark the cost of signing & verifying JWTs."""
+
+    help = "Reports JWT sign & verify operations per second of each supported algorithm"
+
+    def add_arguments(self, parser) -> None:
+        """Add arguments to management command."""
+        parser.add_argument(
+            "--seconds", type=float, default=1.0, help="Time spent per measurement"
+        )
+
+    def handle(self, *args, **kwargs):
+        """Process the command."""
+        seconds = kwargs["seconds"]
+        self.stdout.write(f"{'':<18} {'sign/s':>10} {'verify/s':>10} {'token':>7}")
+        for label, generate in KEYS.items():
+            private_key = generate()
+            public_key = private_key.public_key()
+            algorithm = key_algorithm(private_key)
+            token = jwt.encode(CLAIMS, private_key, algorithm=algorithm)
+            options = {"verify_exp": False}
+
+            signs = ops_per_second(
+                lambda: jwt.encode(CLAIMS, private_key, algorithm=algorithm), seconds
+            )
+            verifies = ops_per_second(
+                lambda: jwt.decode(
+                    token, public_key, algorithms=[algorithm], options=options
+                ),
+                seconds,
+            )
+            self.stdout.write(f"{label:<18} {signs:>10.0f} {verifies:>10.0f} {len(token):>6}B")
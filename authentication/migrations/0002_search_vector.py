@@ -0,0 +1,44 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:15
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_FIELDS = {
+    "User": ["first_name", "last_name", "national_id", "email", "phone_number"],
+}
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Compute the search vectors of existing rows."""
+    for model_name, fields in SEARCH_FIELDS.items():
+        model = apps.get_model("authentication", model_name)
+        model.objects.update(search_vector=SearchVector(*fields))
+
+
+class Migration(migrations.Migration):
+    # the GIN index is built concurrently (without locking out writes)
+    atomic = False
+
+    dependencies = [
+        ("authentication", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="user_search_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from functools import reduce
+from operator import add
+
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_FIELDS = {
+    "User": {
+        "first_name": "B",
+        "last_name": "B",
+        "national_id": "A",
+        "email": "A",
+        "phone_number": "A",
+    },
+}
+
+
+def weigh_search_vectors(apps, schema_editor):
+    """Recompute the search vectors of existing rows with their field weights."""
+    for model_name, weights in SEARCH_FIELDS.items():
+        model = apps.get_model("authentication", model_name)
+        vectors = []
+        for field, weight in weights.items():
+            vectors.append(SearchVector(field, weight=weight))
+        model.objects.update(search_vector=reduce(add, vectors))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0002_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(weigh_search_vectors, migrations.RunPython.noop),
+    ]
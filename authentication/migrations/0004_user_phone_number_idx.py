@@ -0,0 +1,20 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:45
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the index is built concurrently (without locking out writes)
+    atomic = False
+
+    dependencies = [
+        ("authentication", "0003_weighted_search_vector"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(fields=["phone_number"], name="user_phone_number_idx"),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:50
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the GIN indexes are built concurrently (without locking out writes), existing rows'
+    # phonetic keys are filled in by the backfill_phonetic_keys command
+    atomic = False
+
+    dependencies = [
+        ("authentication", "0004_user_phone_number_idx"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="user",
+            name="phonetic_keys",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=4),
+                blank=True,
+                default=list,
+                editable=False,
+                size=None,
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["phonetic_keys"], name="user_phonetic_keys_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["first_name"],
+                name="user_first_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["last_name"],
+                name="user_last_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.1.10 on 2026-10-17 20:40
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0006_revoked_tokens"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenCutoff",
+            fields=[
+                (
+                    "uuid",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("issued_before", models.DateTimeField()),
+                ("expires", models.DateTimeField()),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="token_cutoff",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="tokencutoff",
+            index=models.Index(fields=["updated"], name="tokencutoff_updated_idx"),
+        ),
+    ]
@@ -1,11 +1,22 @@
 """This module houses models for the authentication app."""
 
+import re
+
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import IntegrityError, models
+from django.db.models import Q
 
 from common.constants import GENDERS
-from common.models import BaseModel, Entity
+from common.models import BaseModel, Entity, Searchable
+from common.phonetics import phonetic_keys
+
+# Kenyan mobile numbers, in the +254 (or 254) international or 0 prefixed local format
+PHONE_NUMBER_RE = re.compile(r"^(?:\+?254|0)(\d{9})$")
+NATIONAL_ID_RE = re.compile(r"^\d+$")
+SEPARATORS_RE = re.compile(r"[\s-]")
 
 
 class CustomUserManager(BaseUserManager):
@@ -22,7 +33,7 @@ class CustomUserManager(BaseUserManager):
         return user
 
 
-class User(AbstractBaseUser, Entity, PermissionsMixin):
+class User(Searchable, AbstractBaseUser, Entity, PermissionsMixin):
     """User model."""
 
     GENDERS = BaseModel.preprocess_choices(GENDERS)
@@ -32,6 +43,10 @@ class User(AbstractBaseUser, Entity, PermissionsMixin):
     national_id = models.CharField(null=True, max_length=32, unique=True)
     gender = models.CharField(choices=GENDERS, max_length=6)
     date_of_birth = models.DateField()
+    # Soundex codes of the words of first_name & last_name (see fuzzy_search)
+    phonetic_keys = ArrayField(
+        models.CharField(max_length=4), default=list, blank=True, editable=False
+    )
     relatives = models.ManyToManyField(
         "self",
         through="NextOfKin",
@@ -50,6 +65,16 @@ class User(AbstractBaseUser, Entity, PermissionsMixin):
         "phone_number",
     ]
 
+    SEARCH_FIELDS = {
+        "first_name": "B",
+        "last_name": "B",
+        "national_id": "A",
+        "email": "A",
+        "phone_number": "A",
+    }
+    SEARCH_DEPENDENCIES = ["authentication.NextOfKin"]
+    FUZZY_FIELDS = ["first_name", "last_name"]
+    PHONETIC_KEYS_FIELD = "phonetic_keys"
     POST_REQUIRED_FIELDS = [USERNAME_FIELD, "password"] + REQUIRED_FIELDS
     SERIALIZATION_FIELDS = (
         ["uuid", USERNAME_FIELD]
@@ -59,6 +84,42 @@ class User(AbstractBaseUser, Entity, PermissionsMixin):
 
     class Meta:  # noqa
         ordering = ["-date_joined"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="user_search_idx"),
+            models.Index(fields=["phone_number"], name="user_phone_number_idx"),
+            GinIndex(fields=["phonetic_keys"], name="user_phonetic_keys_idx"),
+            GinIndex(
+                fields=["first_name"],
+                name="user_first_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["last_name"],
+                name="user_last_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Save the user, updating its phonetic_keys if its names changed."""
+        self.phonetic_keys = phonetic_keys(self.first_name, self.last_name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"first_name", "last_name"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "phonetic_keys"}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def identifier_filter(cls, query):
+        """Return a Q of the users with the phone number, national ID or email *query*."""
+        compact = SEPARATORS_RE.sub("", query)
+        match = PHONE_NUMBER_RE.match(compact)
+        if match:
+            return Q(phone_number=f"+254{match.group(1)}")
+        if NATIONAL_ID_RE.match(compact):
+            return Q(national_id=compact)
+        if "@" in query and not any(c.isspace() for c in query):
+            return Q(email=cls.objects.normalize_email(query))
+        return None
 
     @classmethod
     def create(cls, fields):
@@ -100,3 +161,33 @@ class NextOfKin(BaseModel):
             "user",
             "next_of_kin",
         )
+
+
+class RevokedToken(BaseModel):
+    """A revoked JWT, rejected until it expires (see authentication.revocation)."""
+
+    jti = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(
+        User, related_name="revoked_tokens", on_delete=models.CASCADE
+    )
+    expires = models.DateTimeField()  # the token's exp, the row isn't needed after it
+
+    SERIALIZATION_FIELDS = ["uuid", "jti", "user_id", "expires", "created"]
+
+    class Meta:  # noqa
+        # incremental refreshes of the revocation lists of workers
+        indexes = [models.Index(fields=["created"], name="revokedtoken_created_idx")]
+
+
+class TokenCutoff(BaseModel):
+    """Revokes the tokens a user was issued up to *issued_before* (e.g. when compromised)."""
+
+    user = models.OneToOneField(User, related_name="token_cutoff", on_delete=models.CASCADE)
+    issued_before = models.DateTimeField()
+    expires = models.DateTimeField()  # the last token issued before the cutoff expires
+
+    SERIALIZATION_FIELDS = ["uuid", "user_id", "issued_before", "expires", "updated"]
+
+    class Meta:  # noqa
+        # incremental refreshes of the revocation lists of workers (cutoffs are moved)
+        indexes = [models.Index(fields=["updated"], name="tokencutoff_updated_idx")]
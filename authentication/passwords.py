@@ -0,0 +1,83 @@
+"""
+This module houses the bounded process pool that login password checks run in.
+
+Password hashing is deliberately slow, checking passwords in a pool of
+LOGIN_HASH_WORKERS processes keeps login bursts from using every core (& thread) of a
+worker. At most LOGIN_MAX_PENDING checks wait for the pool, further logins are turned
+away (see LoginBusy) instead of queueing up behind them.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.utils.crypto import get_random_string
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.LOGIN_MAX_PENDING)
+# hash of a random password, checked for unknown users so they take as long as known ones
+_dummy_password = None
+
+
+class LoginBusy(Exception):
+    """Raised when too many password checks are pending (or the pool broke)."""
+
+
+def _verify(hasher, password, encoded):
+    """Return whether *password* matches the *encoded* hash (runs in the pool)."""
+    return hasher.verify(password, encoded)
+
+
+def get_executor():
+    """Return the process pool, starting it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawned (not forked) processes don't inherit the locks of other threads
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.LOGIN_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _executor
+
+
+def discard_executor(executor):
+    """Drop a broken process pool (e.g. one of its processes was killed) for a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def check_password(password, encoded=None):
+    """
+    Return whether *password* matches the *encoded* hash (raises LoginBusy).
+
+    Without *encoded* (e.g. for unknown users) a dummy hash is checked & False returned.
+    """
+    global _dummy_password
+    if encoded is None:
+        if _dummy_password is None:
+            _dummy_password = make_password(get_random_string(32))
+        encoded = _dummy_password
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:  # unusable passwords
+        return False
+
+    if not _slots.acquire(blocking=False):
+        raise LoginBusy()
+    executor = get_executor()
+    try:
+        matches = executor.submit(_verify, hasher, password, encoded).result()
+    except BrokenProcessPool:
+        discard_executor(executor)
+        raise LoginBusy()
+    finally:
+        _slots.release()
+    return matches and encoded is not _dummy_password
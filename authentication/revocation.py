@@ -0,0 +1,138 @@
+"""
+This module houses the per-worker list of revoked tokens that requests are checked against.
+
+The jtis of unexpired RevokedTokens are kept in a Bloom filter, so tokens are checked
+in O(1) without a query (only tokens the filter reports as revoked, i.e. revoked ones
+& rare false positives, are looked up). The (few) TokenCutoffs of users whose tokens
+were all revoked are kept in a dict. A background thread adds the rows created (or
+cutoffs moved) since the last refresh every TOKEN_REVOCATION_REFRESH_INTERVAL seconds &
+rebuilds the filter (dropping expired revocations) when it's full or
+TOKEN_REVOCATION_REBUILD_INTERVAL seconds old. Tokens revoked by this worker are added
+to its list right away.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone as django_timezone
+
+from common.bloom import BloomFilter
+
+from .models import RevokedToken, TokenCutoff
+
+logger = logging.getLogger(__name__)
+
+# Rows created up to this long before a refresh are read again, in case they were
+# committed after it
+REFRESH_OVERLAP = timedelta(seconds=30)
+# How long the tokens issued by login are valid (one solar year lol)
+TOKEN_LIFETIME = timedelta(seconds=31556926)
+
+
+class RevocationList:
+    """The jtis of the revoked tokens, refreshed in the background."""
+
+    def __init__(self):  # noqa
+        # (Bloom filter of jtis, time of the last refresh, monotonic time of the last build,
+        #  {user id: timestamp the user's tokens were issued before to be revoked})
+        self.state = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def build(self):
+        """Load the jtis of all unexpired revoked tokens into a new filter."""
+        started = django_timezone.now()
+        rows = RevokedToken.objects.filter(expires__gt=started)
+        capacity = max(settings.TOKEN_REVOCATION_CAPACITY, 2 * rows.count())
+        bloom = BloomFilter(capacity, settings.TOKEN_REVOCATION_ERROR_RATE)
+        for jti in rows.values_list("jti", flat=True).iterator():
+            bloom.add(jti)
+        cutoffs = TokenCutoff.objects.filter(expires__gt=started)
+        cutoffs = {
+            str(user_id): issued_before.timestamp()
+            for user_id, issued_before in cutoffs.values_list("user", "issued_before")
+        }
+        self.state = (bloom, started, time.monotonic(), cutoffs)
+        logger.info(
+            "Revocation list loaded (%s tokens, %s users).", len(bloom), len(cutoffs)
+        )
+
+    def refresh(self):
+        """Add the tokens revoked since the previous refresh, or rebuild a full filter."""
+        bloom, last_refresh, built, cutoffs = self.state
+        if (
+            len(bloom) >= bloom.capacity
+            or time.monotonic() - built > settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+        ):
+            return self.build()
+
+        started = django_timezone.now()
+        rows = RevokedToken.objects.filter(created__gte=last_refresh - REFRESH_OVERLAP)
+        for jti in rows.values_list("jti", flat=True):
+            if jti not in bloom:
+                bloom.add(jti)
+        moved = TokenCutoff.objects.filter(updated__gte=last_refresh - REFRESH_OVERLAP)
+        for user_id, issued_before in moved.values_list("user", "issued_before"):
+            cutoffs[str(user_id)] = issued_before.timestamp()
+        self.state = (bloom, started, built, cutoffs)
+
+    def _refresh_periodically(self):
+        """Refresh the list every TOKEN_REVOCATION_REFRESH_INTERVAL seconds."""
+        while True:
+            time.sleep(settings.TOKEN_REVOCATION_REFRESH_INTERVAL)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh the revocation list.")
+            finally:
+                connection.close()
+
+    def get_state(self):
+        """Return the current state, loading it (& starting the refreshes) on first use."""
+        if self.state is None:
+            with self._lock:
+                if self.state is None:
+                    self.build()
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._refresh_periodically, daemon=True
+                    )
+                    self._thread.start()
+        return self.state
+
+    def is_revoked(self, claims):
+        """Return whether the token with (verified) *claims* was revoked."""
+        bloom, _, _, cutoffs = self.get_state()
+        cutoff = cutoffs.get(claims.get("sub"))
+        if cutoff is not None and claims.get("iat", 0) <= cutoff:
+            return True
+        jti = claims.get("jti")
+        if jti is None or jti not in bloom:  # tokens without a jti can only be cut off
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()  # rule false positives out
+
+    def revoke(self, claims):
+        """Revoke the token with (verified) *claims*."""
+        RevokedToken.objects.get_or_create(
+            jti=claims["jti"],
+            defaults={
+                "user_id": claims["sub"],
+                "expires": datetime.fromtimestamp(claims["exp"], tz=timezone.utc),
+            },
+        )
+        self.get_state()[0].add(claims["jti"])
+
+    def revoke_user(self, user):
+        """Revoke all the tokens *user* has been issued so far."""
+        now = django_timezone.now()
+        TokenCutoff.objects.update_or_create(
+            user=user, defaults={"issued_before": now, "expires": now + TOKEN_LIFETIME}
+        )
+        self.get_state()[3][str(user.uuid)] = now.timestamp()
+
+
+revoked_tokens = RevocationList()
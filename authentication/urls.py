@@ -7,4 +7,6 @@ from . import views
 urlpatterns = [
     path("login/", views.login),
     path("register/", views.register_user),
+    path("revoke/", views.revoke_token),
+    path("revoke/users/<uuid:user_id>/", views.revoke_user_tokens),
 ]
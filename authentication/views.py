@@ -1,21 +1,25 @@
 """This module houses API endpoints for the authentication app."""
 
-import os
-from datetime import timedelta
+import uuid
 
 import jwt
-from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import identify_hasher
+from django.db.models import OuterRef, Subquery
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
-from common.middleware import require_service
+from common.keyring import keyring
+from common.middleware import decode_token, require_roles, require_service
 from common.payload import (ErrorCode, create_error_payload,
                             create_success_payload)
 from common.utils import create, validate_post_data
-from index.models import Practitioner
+from index.models import Tenure
 
 from .models import User
+from .passwords import LoginBusy, check_password
+from .revocation import TOKEN_LIFETIME, revoked_tokens
 
 
 @csrf_exempt
@@ -39,30 +43,95 @@ def login(request):
             debug_data["data"], message=debug_data["message"]
         )  # pragma: no cover
 
-    user = authenticate(email=request_data["email"], password=request_data["password"])
-    if user is not None:
-        now = timezone.now()
-        roles = ["PATIENT"]
-        # check if user is a practitioner
-        try:
-            practitioner = Practitioner.objects.get(user=user)
-            roles.append("PRACTITIONER")
-            roles.append(practitioner.type)
-        except Practitioner.DoesNotExist:
-            pass
-
-        claims = {
-            "sub": str(user.uuid),
-            "iat": now.timestamp(),
-            "exp": (
-                now + timedelta(seconds=31556926)  # one solar year lol
-            ).timestamp(),
-            "roles": " ".join(roles),
-        }
-        token = jwt.encode(claims, os.environ["JWT_PRIVATE_KEY"], algorithm="RS384")
-        return create_success_payload(
-            {"token": token, "user": user.serialize()},
-            message="Login successful.",
+    # the user, its practitioner & current tenure in one query
+    current_tenures = Tenure.objects.filter(
+        practitioner__user=OuterRef("pk"), end__isnull=True
+    ).order_by("-start")
+    users = User.serializable(
+        User.objects.select_related("practitioner").annotate(
+            tenure_id=Subquery(current_tenures.values("uuid")[:1]),
+            facility_id=Subquery(current_tenures.values("facility")[:1]),
         )
-    else:
+    )
+    user = users.filter(email=request_data["email"]).first()
+
+    try:
+        # like django.contrib.auth.authenticate(), unknown users are hashed for too
+        password_matches = check_password(
+            request_data["password"], None if user is None else user.password
+        )
+    except LoginBusy:
+        return create_error_payload(
+            {}, message="Too many logins, please try again.", status=503
+        )
+    if not password_matches or not user.is_active:
         return create_error_payload({"message": ErrorCode.LOGIN_FAILED})
+    if identify_hasher(user.password).must_update(user.password):
+        user.set_password(request_data["password"])
+        user.save(update_fields=["password"])
+
+    now = timezone.now()
+    roles = ["PATIENT"]
+    claims = {
+        "sub": str(user.uuid),
+        "iat": now.timestamp(),
+        "exp": (now + TOKEN_LIFETIME).timestamp(),
+        "jti": uuid.uuid4().hex,  # the token's id, see revoke_token
+    }
+    practitioner = getattr(user, "practitioner", None)
+    if practitioner is not None:
+        roles += ["PRACTITIONER", practitioner.type]
+        if user.tenure_id is not None:
+            claims["tenure"] = str(user.tenure_id)
+            claims["facility"] = str(user.facility_id)
+    claims["roles"] = " ".join(roles)
+
+    kid, algorithm, key = keyring.signing_key()
+    token = jwt.encode(claims, key, algorithm=algorithm, headers={"kid": kid})
+    return create_success_payload(
+        {"token": token, "user": user.serialize()},
+        message="Login successful.",
+    )
+
+
+@require_roles(["PATIENT"])
+@csrf_exempt
+@require_POST
+@require_service("AUTH")
+def revoke_token(request):
+    """Revoke a token, the caller's own (default) or, for superusers, anyone's."""
+    is_valid, request_data, debug_data = validate_post_data(request, [])
+    if not is_valid:
+        return create_error_payload(debug_data["data"], message=debug_data["message"])
+
+    token = request_data.get("token", request.token["raw"])
+    if not isinstance(token, str):
+        return create_error_payload({}, message="Invalid token.")
+    try:
+        claims = decode_token(token)
+    except jwt.exceptions.InvalidTokenError:
+        return create_error_payload({}, message="Invalid token.")
+    if (
+        claims.get("sub") != request.token["sub"]
+        and not User.objects.filter(uuid=request.token["sub"], is_superuser=True).exists()
+    ):
+        return create_error_payload({}, message=ErrorCode.UNAUTHORIZED, status=403)
+    if "jti" not in claims or "exp" not in claims:
+        return create_error_payload({}, message="Tokens without a jti can't be revoked.")
+
+    revoked_tokens.revoke(claims)
+    return create_success_payload({}, message="Token revoked.")
+
+
+@require_roles(["PATIENT"])
+@csrf_exempt
+@require_POST
+@require_service("AUTH")
+def revoke_user_tokens(request, user_id):
+    """Revoke all the tokens a user has been issued so far (superusers only)."""
+    if not User.objects.filter(uuid=request.token["sub"], is_superuser=True).exists():
+        return create_error_payload({}, message=ErrorCode.UNAUTHORIZED, status=403)
+    user = get_object_or_404(User, uuid=user_id)
+
+    revoked_tokens.revoke_user(user)
+    return create_success_payload({}, message="Tokens revoked.")
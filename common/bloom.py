@@ -0,0 +1,41 @@
+"""This module houses a Bloom filter, a compact set with false positives but no false negatives."""
+
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """A Bloom filter of strings sized for *capacity* items at a false positive *error_rate*."""
+
+    def __init__(self, capacity, error_rate=0.001):  # noqa
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()  # readers don't need it
+
+    def _positions(self, item):
+        """Return the bit positions of *item* (double hashing of one 128 bit digest)."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """Add *item* to the filter."""
+        positions = self._positions(item)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item):  # noqa
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def __len__(self):  # noqa
+        return self.count
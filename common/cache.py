@@ -0,0 +1,99 @@
+"""This module houses in-process caches."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """A thread-safe, size-bounded mapping that evicts the least recently used entries."""
+
+    def __init__(self, maxsize):  # noqa
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value cached under *key* (or *default*) & mark it as recently used."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Cache *value* under *key*, evicting the least recently used entries if full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):  # noqa
+        return len(self._data)
+
+
+class VersionedLRUCache(LRUCache):
+    """An LRUCache whose entries are dropped whenever the version of its source changes."""
+
+    def __init__(self, maxsize):  # noqa
+        super().__init__(maxsize)
+        self.version = None
+
+    def validate(self, version):
+        """Clear the cache if it holds entries from a version other than *version*."""
+        with self._lock:
+            if version != self.version:
+                self._data.clear()
+                self.version = version
+
+
+class TTLLRUCache(LRUCache):
+    """An LRUCache whose entries expire *ttl* seconds after being set, counting hits & misses."""
+
+    def __init__(self, maxsize, ttl):  # noqa
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the unexpired value cached under *key* (or *default*)."""
+        entry = super().get(key)
+        with self._lock:
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Cache *value* under *key* for the next *ttl* seconds (default: self.ttl)."""
+        ttl = self.ttl if ttl is None else ttl
+        super().set(key, (time.monotonic() + ttl, value))
+
+    def clear(self):
+        """Drop all entries & reset the counters."""
+        super().clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Return the cache's hit & miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
@@ -46,9 +46,11 @@ REGIONS = {
 
 COUNTIES = reduce(lambda x, y: x + y, REGIONS.values(), [])
 
+# county choice -> region choice (e.g. "TAITA_TAVETA" -> "COAST")
 counties_to_regions_map = {}
 for region, counties in REGIONS.items():
     counties = BaseModel.preprocess_choices(counties)
+    region = BaseModel.preprocess_choices([region])[0][0]
     for county in counties:
         counties_to_regions_map[county[0]] = region
 
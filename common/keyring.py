@@ -0,0 +1,162 @@
+"""
+This module houses the ring of (parsed) keys that JWTs are signed & verified with.
+
+Keys are PEM files under settings.JWT_KEY_DIR: <kid>.key.pub public keys (verification)
+and optional <kid>.key private keys (signing). The directory is rescanned every
+JWT_KEY_RELOAD_INTERVAL seconds & reloaded when a file is added, removed or modified,
+so keys can be rotated without a restart: add the new key pair, make it the active one
+(JWT_ACTIVE_KID, default: the newest private key) & remove the old public key once the
+tokens it signed have expired.
+
+Without JWT_KEY_DIR, the server's single legacy key pair is loaded as JWT_DEFAULT_KID,
+the kid tokens without a kid header (those issued before keys had ids) are verified with.
+
+Each key is used with the algorithm of its type (see ALGORITHMS), tokens are only
+verified with the algorithm of the key their kid names, so keys of different types can
+be mixed while migrating from one algorithm to another. Keys whose algorithm isn't in
+settings.JWT_ALGORITHMS are ignored.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from cryptography.exceptions import UnsupportedAlgorithm
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import (load_pem_private_key,
+                                                          load_pem_public_key)
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_KEY_SUFFIX = ".key.pub"
+PRIVATE_KEY_SUFFIX = ".key"
+# JWT algorithm of each (public & private) key type
+ALGORITHMS = {
+    rsa.RSAPublicKey: "RS384",
+    rsa.RSAPrivateKey: "RS384",
+    ec.EllipticCurvePublicKey: "ES256",
+    ec.EllipticCurvePrivateKey: "ES256",
+    ed25519.Ed25519PublicKey: "EdDSA",
+    ed25519.Ed25519PrivateKey: "EdDSA",
+}
+
+
+def key_algorithm(key):
+    """Return the JWT algorithm a (parsed) key is used with."""
+    for key_type, algorithm in ALGORITHMS.items():
+        if isinstance(key, key_type):
+            if algorithm == "ES256" and not isinstance(key.curve, ec.SECP256R1):
+                break  # ES256 is defined for P-256 keys only
+            return algorithm
+    raise ValueError(f"Keys of type {type(key).__name__} aren't supported.")
+
+
+class KeyRing:
+    """The parsed JWT keys, reloaded when their files change."""
+
+    def __init__(self):  # noqa
+        # (files signature, version, {kid: (algorithm, public key)},
+        #  {kid: (algorithm, private key)}, active kid)
+        self.state = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_files():
+        """Return a {kid: (public key path, private key path)} dict of the key files."""
+        if not settings.JWT_KEY_DIR:
+            path = settings.JWT_LEGACY_KEY_PATH
+            return {settings.JWT_DEFAULT_KID: (path + ".pub", path)}
+        files = {}
+        for name in os.listdir(settings.JWT_KEY_DIR):
+            if name.endswith(PUBLIC_KEY_SUFFIX):
+                path = os.path.join(settings.JWT_KEY_DIR, name[: -len(".pub")])
+                files[name[: -len(PUBLIC_KEY_SUFFIX)]] = (path + ".pub", path)
+        return files
+
+    @staticmethod
+    def signature(files):
+        """Return the (path, mtime, size) of every existing key file of *files*."""
+        signature = []
+        for paths in sorted(files.values()):
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def load(self, files, signature):
+        """Parse the keys of *files* & swap them in, skipping the keys that can't be read."""
+        public_keys, private_keys, modified = {}, {}, {}
+        for kid, (public_path, private_path) in files.items():
+            try:
+                with open(public_path, "rb") as f:
+                    key = load_pem_public_key(f.read())
+                algorithm = key_algorithm(key)
+            except (OSError, ValueError, UnsupportedAlgorithm) as e:
+                # e.g. a key deleted since the directory was listed or still being copied
+                logger.warning("Ignoring JWT key %s: %s", kid, e)
+                continue
+            if algorithm not in settings.JWT_ALGORITHMS:
+                logger.warning("Ignoring JWT key %s (%s isn't accepted).", kid, algorithm)
+                continue
+            public_keys[kid] = (algorithm, key)
+            try:
+                with open(private_path, "rb") as f:
+                    key = load_pem_private_key(f.read(), password=None)
+                    mtime = os.fstat(f.fileno()).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, TypeError, UnsupportedAlgorithm) as e:
+                logger.warning("Ignoring private JWT key %s: %s", kid, e)
+                continue
+            private_keys[kid] = (algorithm, key)
+            modified[kid] = mtime
+
+        active_kid = settings.JWT_ACTIVE_KID or max(modified, key=modified.get, default=None)
+        version = 1 if self.state is None else self.state[1] + 1
+        self.state = (signature, version, public_keys, private_keys, active_kid)
+        logger.info(
+            "JWT key ring loaded (kids: %s, active: %s).", ", ".join(public_keys), active_kid
+        )
+
+    def get_state(self):
+        """Return the current state, reloading the keys if their files changed."""
+        if self.state is None or time.monotonic() - self._checked > (
+            settings.JWT_KEY_RELOAD_INTERVAL
+        ):
+            with self._lock:
+                self._checked = time.monotonic()
+                try:
+                    files = self.key_files()
+                    signature = self.signature(files)
+                    if self.state is None or signature != self.state[0]:
+                        self.load(files, signature)
+                except Exception:
+                    if self.state is None:
+                        raise
+                    logger.exception("Failed to reload the JWT key ring, keeping its keys.")
+        return self.state
+
+    @property
+    def version(self):
+        """Return the number of times the keys have been loaded."""
+        return self.get_state()[1]
+
+    def public_key(self, kid=None):
+        """Return the (algorithm, public key) with *kid* (default: JWT_DEFAULT_KID) or None."""
+        return self.get_state()[2].get(settings.JWT_DEFAULT_KID if kid is None else kid)
+
+    def signing_key(self):
+        """Return the (kid, algorithm, private key) that tokens are signed with."""
+        _, _, _, private_keys, active_kid = self.get_state()
+        if active_kid not in private_keys:
+            raise RuntimeError(f"There's no private JWT key with kid {active_kid!r}.")
+        return (active_kid, *private_keys[active_kid])
+
+
+keyring = KeyRing()
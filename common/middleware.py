@@ -1,13 +1,23 @@
 """This module houses access control decorators & middleware."""
 
-import os
+import hashlib
+import time
 from functools import wraps
 
 import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
+from authentication.revocation import revoked_tokens
+from common.cache import TTLLRUCache
+from common.keyring import keyring
 from common.payload import ErrorCode, create_error_payload
 from common.utils import parameterized
 
+# (key ring version, sha256 of a token) -> its verified claims, each entry expires with its
+# token (or once the keys are reloaded)
+verified_claims = TTLLRUCache(settings.JWT_CLAIMS_CACHE_SIZE, ttl=0)
+
 
 @parameterized
 def require_roles(fn, roles):
@@ -22,14 +32,40 @@ def require_roles(fn, roles):
 
 @parameterized
 def require_service(fn, service):
-    """Ensure that the server serving a request provides a specific service."""
+    """
+    Ensure that the server serving a request provides a specific service.
+
+    Views of services the server doesn't provide aren't routed (see config.urls), so this
+    is resolved once, at import, & only guards other callers (e.g. management commands).
+    """
+    if service in settings.SERVER_SERVICES:
+        return fn
 
     def wrapper(*args, **kwargs):
-        if service not in os.environ["SERVER_SERVICES"].split(" "):
-            raise Exception(f"{service} not supported on this server.")
-        return fn(*args, **kwargs)
+        raise ImproperlyConfigured(f"{service} not supported on this server.")
+
+    return wraps(fn)(wrapper)
 
-    return wrapper
+
+def decode_token(token):
+    """
+    Return the claims of a bearer *token* (raises jwt.exceptions.InvalidTokenError).
+
+    Tokens are verified with the key (& algorithm) named by their kid header. Signatures are
+    only verified the first time a token is seen, its claims are then cached until it
+    expires. Tokens without an exp claim aren't cached.
+    """
+    key = (keyring.version, hashlib.sha256(token.encode()).digest())
+    claims = verified_claims.get(key)
+    if claims is None:
+        public_key = keyring.public_key(jwt.get_unverified_header(token).get("kid"))
+        if public_key is None:
+            raise jwt.exceptions.DecodeError("Unknown kid.")
+        algorithm, public_key = public_key
+        claims = jwt.decode(token, public_key, algorithms=[algorithm])
+        if "exp" in claims:
+            verified_claims.set(key, claims, ttl=claims["exp"] - time.time())
+    return {**claims, "raw": token}
 
 
 class LoginRequiredMiddleware:
@@ -54,11 +90,12 @@ class LoginRequiredMiddleware:
             return create_error_payload({}, message=ErrorCode.UNAUTHORIZED, status=401)
 
         try:
-            decoded_token = jwt.decode(
-                token[7:], os.environ["JWT_PUBLIC_KEY"], algorithms=["RS384"]
-            )
-            decoded_token["raw"] = token[7:]
-        except jwt.exceptions.DecodeError:
+            decoded_token = decode_token(token[7:])
+        except jwt.exceptions.InvalidTokenError:  # e.g. expired or signed with another algorithm
+            return create_error_payload({}, message=ErrorCode.UNAUTHORIZED, status=401)
+        if revoked_tokens.is_revoked(decoded_token):
+            return create_error_payload({}, message=ErrorCode.UNAUTHORIZED, status=401)
+        if not isinstance(decoded_token.get("roles"), str):
             return create_error_payload({}, message=ErrorCode.UNAUTHORIZED, status=401)
 
         tokens_roles = decoded_token["roles"].split(" ")
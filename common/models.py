@@ -1,9 +1,57 @@
 """This module houses common abstract models."""
 
+import threading
 import uuid
+from contextlib import contextmanager
+from functools import lru_cache, reduce
+from operator import add
 
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, SearchVectorField,
+                                            TrigramSimilarity)
+from django.core.exceptions import FieldDoesNotExist
 from django.core.validators import RegexValidator
 from django.db import IntegrityError, models
+from django.db.models import F, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Cast, Concat
+
+from common.phonetics import soundex, words
+from common.serializers import freeze_fields, get_serializer
+
+
+def _prefix_lookup(prefix, lookup):
+    """Nest a related lookup (str or Prefetch) under the relation *prefix*."""
+    if isinstance(lookup, Prefetch):
+        return Prefetch(
+            f"{prefix}__{lookup.prefetch_through}", queryset=lookup.queryset
+        )
+    return f"{prefix}__{lookup}"
+
+
+def apply_serialization_plan(queryset, plan):
+    """Apply a (select_related, prefetch_related) plan to a queryset."""
+    select_related, prefetch_related = plan
+    if select_related:  # select_related() without arguments follows every FK
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+_search_vectors = threading.local()
+
+
+@contextmanager
+def deferred_search_vectors(*models):
+    """Skip per-row search vector updates, then update the vectors of *models* in bulk."""
+    _search_vectors.deferred = True
+    try:
+        yield
+    finally:
+        _search_vectors.deferred = False
+    for model in models:
+        model.update_search_vectors()
 
 
 class BaseModel(models.Model):
@@ -11,6 +59,10 @@ class BaseModel(models.Model):
 
     POST_REQUIRED_FIELDS = []
     SERIALIZATION_FIELDS = []
+    # Related lookups read by properties listed in SERIALIZATION_FIELDS
+    SERIALIZATION_PREFETCH = {}
+    # Choice fields that list & search payloads can be filtered by & count rows per value of
+    FACET_FIELDS = []
 
     uuid = models.UUIDField(
         unique=True, default=uuid.uuid4, editable=False, primary_key=True
@@ -62,20 +114,76 @@ class BaseModel(models.Model):
             result.append(("_".join(code.split(" ")), choice))
         return result
 
-    def serialize(self):
-        """Convert self into a dictionary with self.SERIALIZATION_FIELDS keys."""
-        result = {}
-        for field in self.SERIALIZATION_FIELDS:
-            obj = getattr(self, field)
-            if isinstance(obj, (bool, str, int, dict)) or obj is None:
-                result[field] = obj
-            elif isinstance(obj, models.Manager):
-                result[field] = [x.serialize() for x in obj.all()]
-            elif isinstance(obj, BaseModel):
-                result[field] = obj.serialize()
+    @classmethod
+    def serialization_plan(cls, fields=None, depth=None):
+        """Return the (select_related, prefetch_related) lookups read by cls.serialize()."""
+        return cls._cached_serialization_plan(freeze_fields(fields), depth)
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _cached_serialization_plan(cls, fields, depth):
+        """Cache serialization plans per model, (frozen) sparse fieldset & depth."""
+        return cls._plan_serialization(fields, depth, frozenset())
+
+    @classmethod
+    def _plan_serialization(cls, fields, depth, seen):
+        """Walk SERIALIZATION_FIELDS recursively, stopping at models already on the path."""
+        select_related, prefetch_related = [], []
+        fields = None if fields is None else dict(fields)
+        seen = seen | {cls}
+        for name in cls.SERIALIZATION_FIELDS:
+            if fields is not None and name not in fields:
+                continue
+            try:
+                field = cls._meta.get_field(name)
+            except FieldDoesNotExist:
+                if depth != 0:
+                    prefetch_related.extend(cls.SERIALIZATION_PREFETCH.get(name, []))
+                continue
+            # skip plain columns & FK attnames (e.g. "encounter_id")
+            if not field.is_relation or field.name != name or depth == 0:
+                continue
+
+            related_model = field.related_model
+            if related_model in seen:
+                # self-referential relations (e.g. User.relatives) are only planned one level deep
+                nested_plan = ([], [])
             else:
-                result[field] = str(obj)
-        return result
+                nested_plan = related_model._plan_serialization(
+                    fields and fields[name], None if depth is None else depth - 1, seen
+                )
+
+            if field.many_to_one or field.one_to_one:
+                select_related.append(name)
+                select_related.extend(f"{name}__{lookup}" for lookup in nested_plan[0])
+                prefetch_related.extend(
+                    _prefix_lookup(name, lookup) for lookup in nested_plan[1]
+                )
+            else:
+                queryset = apply_serialization_plan(
+                    related_model._default_manager.all(), nested_plan
+                )
+                prefetch_related.append(Prefetch(name, queryset=queryset))
+        return select_related, prefetch_related
+
+    @classmethod
+    def serializable(cls, queryset=None, fields=None, depth=None):
+        """Return *queryset* (or all rows) with everything cls.serialize() reads preloaded."""
+        if queryset is None:
+            queryset = cls._default_manager.all()
+        return apply_serialization_plan(queryset, cls.serialization_plan(fields, depth))
+
+    def serialize(self, fields=None, depth=None):
+        """
+        Convert self into a dictionary with self.SERIALIZATION_FIELDS keys.
+
+        *fields* is a sparse fieldset (see common.serializers.parse_fields) & *depth*
+        the number of levels of related objects to expand.
+        """
+        names = self.SERIALIZATION_FIELDS
+        if fields is not None:
+            names = [name for name in names if name in fields]
+        return get_serializer(type(self), names, depth == 0)(self, fields, depth)
 
     class Meta:  # noqa
         abstract = True
@@ -98,3 +206,112 @@ class Entity(BaseModel):
 
     class Meta:  # noqa
         abstract = True
+
+
+class Searchable(models.Model):
+    """
+    Abstract model with a stored full text search vector of its SEARCH_FIELDS.
+
+    The vector is updated whenever a row is saved (see deferred_search_vectors for bulk
+    loads) so searches can use a GIN index instead of tokenizing every row per query.
+    """
+
+    # Columns (related ones too, e.g. "user__first_name") covered by the search vector,
+    # mapped to their weight ("A" ranks highest, then "B", "C" & "D")
+    SEARCH_FIELDS = {}
+    # Labels of the other models whose rows are part of search results (e.g. serialized
+    # related objects), changes to them invalidate cached searches (see common.search_cache)
+    SEARCH_DEPENDENCIES = []
+    # Name columns (trigram indexed) matched by fuzzy searches & the (GIN indexed) array of
+    # the Soundex codes of their words, e.g. "user__phonetic_keys"
+    FUZZY_FIELDS = []
+    PHONETIC_KEYS_FIELD = None
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    @classmethod
+    def search_vector_expression(cls):
+        """Return the expression that computes the (weighted) search vector of a row."""
+        vectors = []
+        for field, weight in cls.SEARCH_FIELDS.items():
+            if LOOKUP_SEP in field:
+                # UPDATE can't join, read related columns through a correlated subquery
+                field = Subquery(
+                    cls._base_manager.filter(pk=OuterRef("pk")).values(field)[:1]
+                )
+            vectors.append(SearchVector(field, weight=weight))
+        return reduce(add, vectors)
+
+    @classmethod
+    def identifier_filter(cls, query):
+        """Return a Q of the rows identified by *query* (None if it isn't an identifier)."""
+        return None
+
+    @classmethod
+    def search(cls, query, queryset=None):
+        """Return the rows matching the full text *query*, annotated with their rank."""
+        if queryset is None:
+            queryset = cls._default_manager.all()
+        identifier = cls.identifier_filter(query.strip())
+        if identifier is not None:  # an (indexed) exact lookup instead of a text search
+            return queryset.filter(identifier).annotate(
+                rank=Value(1.0, output_field=models.FloatField())
+            )
+        query = SearchQuery(query)
+        # ts_rank() returns a real, cast it so cursors round-trip it exactly
+        rank = Cast(SearchRank(F("search_vector"), query), models.FloatField())
+        return queryset.filter(search_vector=query).annotate(rank=rank)
+
+    @classmethod
+    def fuzzy_search(cls, query, queryset=None):
+        """
+        Return the rows whose FUZZY_FIELDS sound like or are spelled similar to *query*.
+
+        Every word of *query* must match a name phonetically (same Soundex code) or by
+        trigram similarity, both of which are indexed, rows are ranked by the trigram
+        similarity of their full name to *query*.
+        """
+        if not cls.FUZZY_FIELDS:
+            raise ValueError(f"{cls._meta.verbose_name} doesn't support fuzzy search.")
+        if queryset is None:
+            queryset = cls._default_manager.all()
+        query_words = words(query)
+        if not query_words:
+            return queryset.none().annotate(rank=Value(0.0, models.FloatField()))
+
+        condition = Q()
+        for word in query_words:
+            word_condition = Q(**{f"{cls.PHONETIC_KEYS_FIELD}__contains": [soundex(word)]})
+            for field in cls.FUZZY_FIELDS:
+                word_condition |= Q(**{f"{field}__trigram_similar": word})
+            condition &= word_condition
+
+        name = [F(cls.FUZZY_FIELDS[0])]
+        for field in cls.FUZZY_FIELDS[1:]:
+            name += [Value(" "), F(field)]
+        name = Concat(*name, output_field=models.TextField()) if len(name) > 1 else name[0]
+        # similarity() returns a real, cast it so cursors round-trip it exactly
+        rank = Cast(TrigramSimilarity(name, " ".join(query_words)), models.FloatField())
+        return queryset.filter(condition).annotate(rank=rank)
+
+    @classmethod
+    def update_search_vectors(cls, queryset=None):
+        """Recompute the search vectors of the rows in *queryset* (default: all rows)."""
+        if queryset is None:
+            queryset = cls._base_manager.all()
+        return queryset.update(search_vector=cls.search_vector_expression())
+
+    def save(self, *args, **kwargs):
+        """Save the row & update its search vector if any of the SEARCH_FIELDS changed."""
+        super().save(*args, **kwargs)
+        if getattr(_search_vectors, "deferred", False):
+            return
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            searched = {field.split(LOOKUP_SEP)[0] for field in self.SEARCH_FIELDS}
+            if searched.isdisjoint(update_fields):
+                return
+        self.update_search_vectors(type(self)._base_manager.filter(pk=self.pk))
+
+    class Meta:  # noqa
+        abstract = True
@@ -3,7 +3,11 @@
 from enum import Enum
 from functools import partial
 
-from django.http import JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+# Number of rows fetched from the DB cursor (and written to the response) at a time
+STREAMING_CHUNK_SIZE = 500
 
 
 class ResponseType(str, Enum):
@@ -23,13 +27,94 @@ class ErrorCode(str, Enum):
 
 
 def __create_response_payload(
-    response_type: ResponseType, data={}, message="", status=200
+    response_type: ResponseType, data={}, message="", status=200, **extra
 ):
     """Create an API response (both Success & Error response types)."""
     return JsonResponse(
-        {"status": response_type, "data": data, "message": message}, status=status
+        {"status": response_type, "data": data, "message": message, **extra},
+        status=status,
     )
 
 
 create_success_payload = partial(__create_response_payload, ResponseType.SUCCESS)
 create_error_payload = partial(__create_response_payload, ResponseType.ERROR)
+
+_encoder = DjangoJSONEncoder()
+
+
+def encode_raw_success_payload(fragments, message="", **extra):
+    """Encode a success payload, splicing the pre-encoded JSON *fragments* into data."""
+    tail = _encoder.encode({"message": message, **extra})
+    return b"".join(
+        [
+            f'{{"status": "{ResponseType.SUCCESS.value}", "data": ['.encode(),
+            b", ".join(fragments),
+            f"], {tail[1:]}".encode(),
+        ]
+    )
+
+
+def encode_error_payload(data={}, message="", **extra):
+    """Encode an error payload (e.g. to embed in a success payload's data)."""
+    payload = {"status": ResponseType.ERROR.value, "data": data, "message": message}
+    return _encoder.encode({**payload, **extra}).encode()
+
+
+def create_raw_success_payload(fragments, message="", **extra):
+    """Create a success response, splicing the pre-encoded JSON *fragments* into data."""
+    return HttpResponse(
+        encode_raw_success_payload(fragments, message, **extra),
+        content_type="application/json",
+    )
+
+
+def create_raw_mapping_success_payload(fragments, message="", **extra):
+    """Create a success response with data mapping keys to pre-encoded JSON *fragments*."""
+    tail = _encoder.encode({"message": message, **extra})
+    items = [
+        _encoder.encode(str(key)).encode() + b": " + fragment
+        for key, fragment in fragments.items()
+    ]
+    content = b"".join(
+        [
+            f'{{"status": "{ResponseType.SUCCESS.value}", "data": {{'.encode(),
+            b", ".join(items),
+            f"}}, {tail[1:]}".encode(),
+        ]
+    )
+    return HttpResponse(content, content_type="application/json")
+
+
+def create_streaming_success_payload(
+    rows,
+    serialize=None,
+    message="",
+    chunk_size=STREAMING_CHUNK_SIZE,
+    trailer=None,
+):
+    """
+    Create a success response that streams the serialized *rows* (a queryset or a Page).
+
+    The {"status", "data", "message"} envelope is written incrementally while rows are
+    read from the DB in chunks, so memory use doesn't grow with the number of rows.
+    *trailer* returns extra envelope keys once all rows have been written.
+    """
+    if serialize is None:
+        serialize = rows.model.serialize
+    if trailer is None:
+        trailer = dict
+
+    def stream():
+        yield f'{{"status": "{ResponseType.SUCCESS.value}", "data": ['
+        chunk, separator = [], ""
+        for obj in rows.iterator(chunk_size=chunk_size):
+            chunk.append(_encoder.encode(serialize(obj)))
+            if len(chunk) == chunk_size:
+                yield separator + ", ".join(chunk)
+                chunk, separator = [], ", "
+        if chunk:
+            yield separator + ", ".join(chunk)
+        tail = _encoder.encode({"message": message, **trailer()})
+        yield f"], {tail[1:]}"
+
+    return StreamingHttpResponse(stream(), content_type="application/json")
@@ -0,0 +1,44 @@
+"""This module houses the phonetic keys used by fuzzy name searches."""
+
+import re
+import unicodedata
+
+# American Soundex digits, "h" & "w" don't separate letters with the same digit & vowels do
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+    **dict.fromkeys("aeiouy", ""),
+    **dict.fromkeys("hw", None),
+}
+WORD_RE = re.compile(r"[a-z]+")
+
+
+def words(text):
+    """Return the (ASCII folded, lowercase) words of *text*."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return WORD_RE.findall(text.lower())
+
+
+def soundex(word):
+    """Return the 4 character Soundex code of a (lowercase ASCII) *word*, e.g. R163."""
+    code = word[0].upper()
+    last = SOUNDEX_CODES[word[0]]
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES[letter]
+        if digit is None:
+            continue
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        last = digit
+    return code.ljust(4, "0")
+
+
+def phonetic_keys(*names):
+    """Return the sorted, distinct Soundex codes of the words of *names*."""
+    return sorted({soundex(word) for name in names for word in words(name)})
@@ -0,0 +1,54 @@
+"""
+This module houses the per-worker cache of search results.
+
+Results of coding table searches are keyed by terminology version. Results of other
+models are keyed by a per-model generation, bumped whenever a row of the model (or of a
+model listed in its SEARCH_DEPENDENCIES) is saved or deleted in this worker, so the TTL
+bounds how long other workers may serve stale results.
+"""
+
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.cache import TTLLRUCache
+from common.serializers import freeze_fields
+
+search_results = TTLLRUCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+# model label -> number of changes seen by this worker
+_generations = defaultdict(int)
+
+
+@receiver(post_save, dispatch_uid="invalidate_search_results_on_save")
+@receiver(post_delete, dispatch_uid="invalidate_search_results_on_delete")
+def invalidate_search_results(sender, **kwargs):
+    """Invalidate the cached searches that may include rows of the changed model."""
+    _generations[sender._meta.label] += 1
+
+
+def search_cache_key(
+    model, query, fields, depth, limit, cursor, version=None, fuzzy=False, filters=None
+):
+    """
+    Return the search_results key of a search.
+
+    *version* is the terminology version of coding table searches (None otherwise).
+    """
+    if version is None:
+        labels = [model._meta.label, *model.SEARCH_DEPENDENCIES]
+        version = tuple(_generations[label] for label in labels)
+    return (
+        model._meta.label,
+        version,
+        fuzzy,
+        tuple(sorted((filters or {}).items())),
+        " ".join(query.lower().split()),
+        freeze_fields(fields),
+        depth,
+        limit,
+        # the cursor isn't validated yet & may hold (unhashable) nested values
+        None if cursor is None else json.dumps(cursor),
+    )
@@ -0,0 +1,157 @@
+"""This module houses the compiled per-model serializers used by BaseModel.serialize."""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+
+# Typed converters, these produce the same output as str() on the original value
+# (which is also what string values assigned from POST data pass through as)
+FIELD_CONVERTERS = {
+    models.UUIDField: str,  # 'c8db9bda-c4cb-4c8e-a343-d19ea17f4875'
+    models.DateTimeField: str,  # '2022-02-06 13:20:21.136591+00:00'
+    models.DateField: str,  # '2022-02-06'
+    models.DecimalField: str,  # '1500.00'
+}
+# Values of these fields are already JSON serializable
+PLAIN_FIELDS = (
+    models.BooleanField,
+    models.CharField,
+    models.IntegerField,
+    models.JSONField,
+    models.TextField,
+)
+
+_serializers = {}
+
+
+def serialize_value(obj):
+    """Serialize a value whose type is not known ahead of time (e.g. a property)."""
+    if isinstance(obj, (bool, str, int, dict)) or obj is None:
+        return obj
+    elif isinstance(obj, models.Manager):
+        return [x.serialize() for x in obj.all()]
+    elif isinstance(obj, models.Model):
+        return obj.serialize()
+    return str(obj)
+
+
+def related_objects(obj, name):
+    """Return the objects of a to-many relation, reading the prefetch cache directly if set."""
+    # obj.<name>.all() builds a related manager & queryset per call, even when prefetched
+    try:
+        return obj._prefetched_objects_cache[name]
+    except (AttributeError, KeyError):
+        return getattr(obj, name).all()
+
+
+def _get_converter(field):
+    """Return the typed converter for a concrete field (None if no conversion is needed)."""
+    for field_class in type(field).__mro__:
+        if field_class in FIELD_CONVERTERS:
+            return FIELD_CONVERTERS[field_class]
+        if field_class in PLAIN_FIELDS:
+            return None
+    return serialize_value
+
+
+def parse_fields(fields):
+    """
+    Parse a sparse fieldset such as "uuid,facility.name" into a nested dict.
+
+    e.g. {"uuid": None, "facility": {"name": None}}, where None (instead of a nested
+    dict) selects all of the related model's SERIALIZATION_FIELDS.
+    """
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    elif not isinstance(fields, list):  # e.g. a number in a JSON body
+        raise ValueError("fields must be a comma separated list of field names.")
+    result = {}
+    for path in fields:
+        if not isinstance(path, str):
+            raise ValueError("fields must be a comma separated list of field names.")
+        node = result
+        *parents, name = path.strip().split(".")
+        for parent in parents:
+            if node.get(parent) is None:
+                node[parent] = {}
+            node = node[parent]
+        node.setdefault(name, None)
+    return result
+
+
+def freeze_fields(fields):
+    """Convert a parsed fieldset into a hashable value (e.g. for use as a cache key)."""
+    if fields is None:
+        return None
+    return tuple(sorted((name, freeze_fields(sub)) for name, sub in fields.items()))
+
+
+def _compile_field(model, name, shallow, namespace):
+    """Return the expression that serializes obj.<name> (None to leave the field out)."""
+    accessor = f"obj.{name}" if name.isidentifier() else f"getattr(obj, {name!r})"
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:  # property
+        if shallow and name in getattr(model, "SERIALIZATION_PREFETCH", {}):
+            return None  # the property serializes related objects
+        return f"serialize_value({accessor})"
+
+    if field.is_relation and field.name == name:
+        nested = f"fields and fields.get({name!r}), child_depth"
+        if not (field.many_to_one or field.one_to_one):
+            if shallow:
+                return None
+            return f"[x.serialize({nested}) for x in related_objects(obj, {name!r})]"
+        if not shallow:
+            return f"(None if (v := {accessor}) is None else v.serialize({nested}))"
+        if not field.concrete:  # reverse one-to-one, there's no FK column to read
+            return None
+        # past the depth limit forward relations are represented by their primary key
+        accessor = f"obj.{field.attname}"
+
+    if field.is_relation:  # FK attname, e.g. "encounter_id"
+        field = field.target_field
+    converter = _get_converter(field)
+    if converter is None:
+        return accessor
+    converter_name = f"convert_{len(namespace)}"
+    namespace[converter_name] = converter
+    return f"(None if (v := {accessor}) is None else {converter_name}(v))"
+
+
+def compile_serializer(model, fields, shallow=False):
+    """
+    Compile a function that serializes *model* instances into dicts with *fields* keys.
+
+    The function takes the nested sparse fieldset & remaining depth of related objects.
+    Shallow serializers (depth 0) leave out to-many relations & render FKs as their pk.
+    """
+    namespace = {"serialize_value": serialize_value, "related_objects": related_objects}
+    items = []
+    for name in fields:
+        expression = _compile_field(model, name, shallow, namespace)
+        if expression is not None:
+            items.append(f"        {name!r}: {expression},\n")
+    source = (
+        "def serialize(obj, fields=None, depth=None):\n"
+        "    child_depth = None if depth is None else depth - 1\n"
+        f"    return {{\n{''.join(items)}    }}\n"
+    )
+    exec(compile(source, f"<{model._meta.label} serializer>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+def get_serializer(model, fields, shallow=False):
+    """Return the (cached) compiled serializer for *model* & *fields*."""
+    key = (model, tuple(fields), shallow)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        serializer = _serializers[key] = compile_serializer(model, key[1], shallow)
+    return serializer
+
+
+def compile_serializers(app_models):
+    """Compile the default serializer of every model in *app_models* (call on app ready)."""
+    for model in app_models:
+        fields = getattr(model, "SERIALIZATION_FIELDS", None)
+        if fields and not model._meta.abstract:
+            get_serializer(model, fields)
@@ -1,13 +1,33 @@
 """This module houses common miscellaneous utils."""
 
+import base64
+import binascii
 import json
+from functools import reduce
+from operator import or_
 
 import requests
-from django.contrib.postgres.search import SearchVector
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+from django.shortcuts import get_object_or_404
 
-from common.payload import (ErrorCode, create_error_payload,
-                            create_success_payload)
-from facility.models import Visit
+from common.payload import (STREAMING_CHUNK_SIZE, ErrorCode,
+                            create_error_payload,
+                            create_raw_mapping_success_payload,
+                            create_raw_success_payload,
+                            create_streaming_success_payload,
+                            create_success_payload, encode_error_payload,
+                            encode_raw_success_payload)
+from common.search_cache import search_cache_key, search_results
+from common.serializers import parse_fields
+from facility.models import Coding, Visit
+from facility.search_index import is_index_cursor, terminology_index
+from facility.terminology import (current_version, encoder, get_serialized_rows,
+                                  resolve_codes)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
 
 def validate_post_data(request, required_fields):
@@ -50,16 +70,376 @@ def create(model, request):
         return create_error_payload(message=result)
 
 
-def search_table(model, search_fields, request):
-    """Validate POST query and search the *search_fields columns."""
+def encode_cursor(values):
+    """Encode the ordering values of a page's last row into an opaque cursor."""
+    values = [v if isinstance(v, (int, float)) else str(v) for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode an opaque cursor back into ordering values (raises ValueError)."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError):
+        raise ValueError("Malformed cursor.")
+    if not isinstance(values, list):
+        raise ValueError("Malformed cursor.")
+    return values
+
+
+def get_page_params(params, default_limit=DEFAULT_PAGE_SIZE):
+    """Read & validate the limit & cursor pagination parameters (raises ValueError)."""
+    try:
+        limit = int(params.get("limit", default_limit))
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer.")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+
+    cursor = params.get("cursor")
+    if cursor is not None:
+        cursor = decode_cursor(str(cursor))
+    return limit, cursor
+
+
+class Page:
+    """
+    A keyset (seek) page of a queryset.
+
+    Rows after the cursor are selected with a WHERE clause on the ordering columns
+    instead of an OFFSET, so deep pages cost the same as the first page (given an
+    index on the ordering columns). next_cursor is set once the page has been iterated.
+    """
+
+    def __init__(self, queryset, ordering, limit, cursor=None):  # noqa
+        self.model = queryset.model
+        self.ordering = ordering
+        self.limit = limit
+        self.next_cursor = None
+        if cursor is not None:
+            cursor = self.parse_cursor(queryset, ordering, cursor)
+            queryset = queryset.filter(self.seek(ordering, cursor))
+        self.queryset = queryset.order_by(*ordering)
+
+    @staticmethod
+    def parse_cursor(queryset, ordering, values):
+        """Convert cursor *values* to the types of the ordering columns (raises ValueError)."""
+        if len(values) != len(ordering):
+            raise ValueError("Malformed cursor.")
+        parsed = []
+        for field, value in zip(ordering, values):
+            column = field.lstrip("-")
+            annotation = queryset.query.annotations.get(column)
+            if annotation is not None:
+                model_field = annotation.output_field
+            else:
+                model_field = queryset.model._meta.get_field(column)
+            try:
+                value = model_field.to_python(value)
+            except (ValidationError, TypeError):
+                raise ValueError("Malformed cursor.")
+            if value is None:
+                raise ValueError("Malformed cursor.")
+            parsed.append(value)
+        return parsed
+
+    @staticmethod
+    def seek(ordering, values):
+        """Return a Q selecting the rows that come after *values* in *ordering*."""
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        conditions, equal = [], Q()
+        for field, value in zip(ordering, values):
+            column = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            conditions.append(equal & Q(**{f"{column}__{lookup}": value}))
+            equal &= Q(**{column: value})
+        # the redundant bound on the 1st column lets Postgres start an index range scan
+        column = ordering[0].lstrip("-")
+        lookup = "lte" if ordering[0].startswith("-") else "gte"
+        return Q(**{f"{column}__{lookup}": values[0]}) & reduce(or_, conditions)
+
+    def iterator(self, chunk_size=STREAMING_CHUNK_SIZE):
+        """Yield the page's rows, reading one extra row to find out if there's a next page."""
+        last = None
+        rows = self.queryset[: self.limit + 1].iterator(chunk_size=chunk_size)
+        for count, obj in enumerate(rows):
+            if count == self.limit:
+                self.next_cursor = encode_cursor(
+                    [getattr(last, field.lstrip("-")) for field in self.ordering]
+                )
+                break
+            last = obj
+            yield obj
+
+    def __iter__(self):  # noqa
+        return self.iterator()
+
+
+def get_serialization_params(params):
+    """Read & validate the fields & depth serialization parameters (raises ValueError)."""
+    fields = params.get("fields")
+    if fields in ("", []):
+        fields = None
+    if fields is not None:
+        fields = parse_fields(fields)
+
+    depth = params.get("depth")
+    if depth is not None:
+        # GET parameters are strings, JSON bodies must hold integers (not floats or booleans)
+        if isinstance(depth, str) and depth.isdecimal():
+            depth = int(depth)
+        elif isinstance(depth, bool) or not isinstance(depth, int):
+            raise ValueError("depth must be an integer.")
+        if depth < 0:
+            raise ValueError("depth must not be negative.")
+    return fields, depth
+
+
+def retrieve(model, request, **lookup):
+    """Return a payload with the serialized *model* row matching *lookup* (404 if missing)."""
+    try:
+        fields, depth = get_serialization_params(request.GET)
+    except ValueError as e:
+        return create_error_payload({}, message=str(e))
+
+    obj = get_object_or_404(model.serializable(fields=fields, depth=depth), **lookup)
+    return create_success_payload(obj.serialize(fields, depth))
+
+
+def paginate(queryset, ordering, request, extra=None):
+    """
+    Return a streaming payload with one keyset page of *queryset*.
+
+    *extra* returns additional keys to add to each serialized row. Rows of models with
+    FACET_FIELDS are filtered by them & their facet counts are added to the payload.
+    """
+    model = queryset.model
+    try:
+        filters = get_facet_filters(model, request.GET)
+        fields, depth = get_serialization_params(request.GET)
+        limit, cursor = get_page_params(request.GET)
+        queryset = queryset.filter(**filters)
+        page = Page(model.serializable(queryset, fields, depth), ordering, limit, cursor)
+    except ValueError as e:
+        return create_error_payload({}, message=str(e))
+    facets = count_facets(queryset) if model.FACET_FIELDS else None
+
+    def serialize(obj):
+        result = obj.serialize(fields, depth)
+        if extra is not None:
+            result.update(extra(obj))
+        return result
+
+    def trailer():
+        if facets is None:
+            return {"next_cursor": page.next_cursor}
+        return {"next_cursor": page.next_cursor, "facets": facets}
+
+    return create_streaming_success_payload(page, serialize, trailer=trailer)
+
+
+def get_facet_filters(model, params):
+    """Read & validate the filters on the FACET_FIELDS of *model* (raises ValueError)."""
+    filters = {}
+    for name in model.FACET_FIELDS:
+        value = params.get(name)
+        if value is None:
+            continue
+        choices = [choice for choice, _ in model._meta.get_field(name).choices]
+        if value not in choices:
+            raise ValueError(f"{name} must be one of: {', '.join(choices)}.")
+        filters[name] = value
+    return filters
+
+
+def count_facets(queryset):
+    """Return the {field: {value: count}} counts of the FACET_FIELDS of *queryset*."""
+    fields = queryset.model.FACET_FIELDS
+    facets = {field: {} for field in fields}
+    # one grouped query, each (field, value) count is summed over the other fields' groups
+    groups = queryset.order_by().values_list(*fields).annotate(count=Count("pk"))
+    for *values, count in groups:
+        for field, value in zip(fields, values):
+            facets[field][value] = facets[field].get(value, 0) + count
+    return facets
+
+
+def count_hits(queryset, cap=None):
+    """Count the rows of *queryset* up to *cap*, as a {"total", "relation"} dict."""
+    if cap is None:
+        cap = settings.SEARCH_MAX_TOTAL_HITS
+    total = queryset.order_by().values("pk")[: cap + 1].count()
+    if total > cap:
+        return {"total": cap, "relation": "gte"}
+    return {"total": total, "relation": "eq"}
+
+
+def search_rows(model, params):
+    """
+    Search *model* with the query, filter, pagination & serialization *params*.
+
+    Returns the pre-encoded JSON rows of one page (best matches first) & a dict of the
+    extra payload keys: next_cursor, hits & the facets of models with FACET_FIELDS.
+    Results are cached per worker (see common.search_cache). Raises ValueError.
+    """
+    query = params["query"]
+    if not isinstance(query, str):
+        raise ValueError("query must be a string.")
+    fuzzy = params.get("fuzzy", False)
+    if not isinstance(fuzzy, bool):
+        raise ValueError("fuzzy must be a boolean.")
+    filters = get_facet_filters(model, params)
+    fields, depth = get_serialization_params(params)
+    limit, cursor = get_page_params(params, settings.SEARCH_PAGE_SIZE)
+
+    version = current_version() if issubclass(model, Coding) else None
+    key = search_cache_key(
+        model, query, fields, depth, limit, cursor, version, fuzzy, filters
+    )
+    result = search_results.get(key)
+    if result is None:
+        result = _search_page(model, query, fields, depth, limit, cursor, fuzzy, filters)
+        search_results.set(key, result)
+    return result
+
+
+def _search_page(model, query, fields, depth, limit, cursor, fuzzy=False, filters=None):
+    """Return the pre-encoded JSON rows & extra payload keys of one page of a search."""
+    ordering = ["-rank", "uuid"]
+    if fuzzy:  # raises ValueError unless the model has FUZZY_FIELDS
+        results = model.fuzzy_search(query)
+    else:
+        results = model.search(query)
+    if not fuzzy and issubclass(model, Coding) and fields is None and depth is None:
+        result = terminology_index.search(model, query, limit, cursor)
+        if result is not None:  # served from memory
+            fragments, next_cursor, hits = result
+            if next_cursor is not None:
+                next_cursor = encode_cursor(next_cursor)
+            return fragments, {"next_cursor": next_cursor, "hits": hits}
+        if is_index_cursor(cursor):  # e.g. the index of this worker is being (re)built
+            raise ValueError("Expired cursor, please restart the search.")
+        # splice the cached JSON of coding table rows (only uuids are read here)
+        page = Page(results.only("uuid"), ordering, limit, cursor)
+        uuids = [result.uuid for result in page]
+        extra = {"next_cursor": page.next_cursor, "hits": count_hits(results)}
+        return get_serialized_rows(model, uuids), extra
+
+    if filters:
+        results = results.filter(**filters)
+    page = Page(model.serializable(results, fields, depth), ordering, limit, cursor)
+    fragments = [encoder.encode(obj.serialize(fields, depth)).encode() for obj in page]
+    extra = {"next_cursor": page.next_cursor, "hits": count_hits(results)}
+    if model.FACET_FIELDS:
+        extra["facets"] = count_facets(results)
+    return fragments, extra
+
+
+def search_table(model, request):
+    """Validate POST query and return the best matching rows of *model* first."""
     is_valid, request_data, debug_data = validate_post_data(request, ["query"])
     if not is_valid:
         return create_error_payload(debug_data["data"], message=debug_data["message"])
 
-    results = model.objects.annotate(search=SearchVector(*search_fields)).filter(
-        search=request_data["query"]
+    try:
+        fragments, extra = search_rows(model, request_data)
+    except ValueError as e:
+        return create_error_payload({}, message=str(e))
+    return create_raw_success_payload(fragments, **extra)
+
+
+def search_tables(models, request):
+    """
+    Validate POST searches and run them one after the other (see search_rows).
+
+    Each search is a {"table", "query", ...search_table params} dict where table is a key
+    of *models*, the results (or errors) are keyed by the search's "id" (default: index).
+    """
+    is_valid, request_data, debug_data = validate_post_data(request, ["searches"])
+    if not is_valid:
+        return create_error_payload(debug_data["data"], message=debug_data["message"])
+
+    searches = request_data["searches"]
+    if not isinstance(searches, list) or not all(isinstance(s, dict) for s in searches):
+        return create_error_payload({}, message="searches must be a list of objects.")
+    if not 1 <= len(searches) <= settings.SEARCH_BATCH_MAX_SEARCHES:
+        return create_error_payload(
+            {},
+            message=f"searches must have 1 to {settings.SEARCH_BATCH_MAX_SEARCHES} items.",
+        )
+    keys = []
+    for index, params in enumerate(searches):
+        key = params.get("id", index)
+        if isinstance(key, bool) or not isinstance(key, (str, int)):
+            return create_error_payload({}, message="id must be a string or an integer.")
+        keys.append(str(key))  # the keys of the JSON response
+    if len(set(keys)) != len(keys):
+        return create_error_payload({}, message="ids must be unique.")
+
+    def search(params):
+        table = params.get("table")
+        if not isinstance(table, str) or table not in models:
+            return encode_error_payload(
+                {}, message=f"table must be one of: {', '.join(models)}."
+            )
+        if "query" not in params:
+            return encode_error_payload({"query": ErrorCode.FIELD_REQUIRED})
+        try:
+            fragments, extra = search_rows(models[table], params)
+        except ValueError as e:
+            return encode_error_payload({}, message=str(e))
+        return encode_raw_success_payload(fragments, **extra)
+
+    # the searches are cheap (indexed, often cached or served from memory), running them
+    # on the request's connection beats opening a connection per concurrent search
+    return create_raw_mapping_success_payload(
+        {key: search(params) for key, params in zip(keys, searches)}
+    )
+
+
+def autocomplete_table(model, request):
+    """Return the pre-encoded rows of the coding table *model* best matching GET q."""
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return create_error_payload({"q": ErrorCode.FIELD_REQUIRED})
+
+    try:
+        limit, _ = get_page_params(request.GET, settings.AUTOCOMPLETE_LIMIT)
+    except ValueError as e:
+        return create_error_payload({}, message=str(e))
+    uuids = list(model.autocomplete(query).values_list("uuid", flat=True)[:limit])
+    return create_raw_success_payload(get_serialized_rows(model, uuids))
+
+
+def retrieve_code(model, code):
+    """Return a payload with the row of the coding table *model* with *code* (404 if missing)."""
+    code = model.normalize_code(code)
+    fragment = resolve_codes(model, [code]).get(code)
+    if fragment is None:
+        return create_error_payload({}, ErrorCode.DOES_NOT_EXIST, status=404)
+    return create_success_payload(json.loads(fragment))
+
+
+def resolve_table(model, request):
+    """Validate POST codes & return the matching rows of *model* in the same order."""
+    is_valid, request_data, debug_data = validate_post_data(request, ["codes"])
+    if not is_valid:
+        return create_error_payload(debug_data["data"], message=debug_data["message"])
+
+    codes = request_data["codes"]
+    if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+        return create_error_payload({}, message="codes must be a list of strings.")
+    if len(codes) > settings.RESOLVE_MAX_CODES:
+        return create_error_payload(
+            {}, message=f"At most {settings.RESOLVE_MAX_CODES} codes can be resolved at once."
+        )
+
+    normalized = [model.normalize_code(code) for code in codes]
+    fragments = resolve_codes(model, normalized)
+    return create_raw_success_payload(
+        [fragments[code] for code in normalized if code in fragments],
+        missing=[code for code, key in zip(codes, normalized) if key not in fragments],
     )
-    return create_success_payload([result.serialize() for result in results])
 
 
 def error404(request, exception):
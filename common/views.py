@@ -0,0 +1,14 @@
+"""This module houses API endpoints shared by several services."""
+
+from django.views.decorators.http import require_GET
+
+from common.middleware import require_roles
+from common.payload import create_success_payload
+from common.search_cache import search_results
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+def get_search_cache_stats(request):
+    """GET the hit & miss counters of this worker's search result cache."""
+    return create_success_payload(search_results.stats())
@@ -26,6 +26,9 @@ ADMIN_ENABLED = False
 
 DEBUG_PROPAGATE_EXCEPTIONS = True
 
+# Services (AUTH, INDEX and/or FACILITY) this server provides, only their URLs are mounted
+SERVER_SERVICES = frozenset(os.environ["SERVER_SERVICES"].split())
+
 
 # Application definition
 
@@ -35,6 +38,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "django_extensions",
     "authentication",
@@ -87,6 +91,8 @@ DATABASES = {
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
         "HOST": os.environ["DB_HOST"],
         "PORT": os.environ["DB_PORT"],
+        # how closely a word has to resemble a query to match it (see Coding.autocomplete)
+        "OPTIONS": {"options": "-c pg_trgm.word_similarity_threshold=0.4"},
     }
 }
 
@@ -137,8 +143,62 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Custom Models
 AUTH_USER_MODEL = "authentication.User"
 
-# JWT keys
-with open(f"/usr/app/jwt{os.environ['SERVER_NAME']}RS384.key", "r") as f:
-    os.environ["JWT_PRIVATE_KEY"] = f.read()
-with open(f"/usr/app/jwt{os.environ['SERVER_NAME']}RS384.key.pub", "r") as f:
-    os.environ["JWT_PUBLIC_KEY"] = f.read()
+# Coding tables
+# Max. number of pre-encoded coding table rows cached per worker
+CODING_CACHE_SIZE = int(os.environ.get("CODING_CACHE_SIZE", 100000))
+# How often (in seconds) workers check whether the coding tables have been repopulated
+TERMINOLOGY_VERSION_CHECK_INTERVAL = 30
+# Memory-mapped snapshot of the coding tables (see export_terminology_snapshot)
+TERMINOLOGY_SNAPSHOT_PATH = os.environ.get(
+    "TERMINOLOGY_SNAPSHOT_PATH", BASE_DIR / "terminology.snapshot"
+)
+
+# Search
+# Number of results returned per page when a search doesn't specify a limit
+SEARCH_PAGE_SIZE = int(os.environ.get("SEARCH_PAGE_SIZE", 20))
+# Searches count their total hits up to this number (reported as a lower bound beyond it)
+SEARCH_MAX_TOTAL_HITS = int(os.environ.get("SEARCH_MAX_TOTAL_HITS", 1000))
+# Max. number of search result pages cached per worker & for how long (in seconds)
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", 1000))
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", 60))
+# Max. number of searches per batched search request
+SEARCH_BATCH_MAX_SEARCHES = 10
+
+# Serve coding table searches from an in-memory index (built by each worker on first use)
+TERMINOLOGY_SEARCH_INDEX = os.environ.get("TERMINOLOGY_SEARCH_INDEX", "") == "true"
+# Max. number of codes a coding table resolve request may look up
+RESOLVE_MAX_CODES = int(os.environ.get("RESOLVE_MAX_CODES", 5000))
+# Number of suggestions returned by the coding table autocomplete endpoints
+AUTOCOMPLETE_LIMIT = int(os.environ.get("AUTOCOMPLETE_LIMIT", 10))
+
+# Max. number of verified JWT claims cached per worker (see common.middleware)
+JWT_CLAIMS_CACHE_SIZE = int(os.environ.get("JWT_CLAIMS_CACHE_SIZE", 10000))
+
+# JWT keys, <kid>.key & <kid>.key.pub PEM files under JWT_KEY_DIR (see common.keyring)
+JWT_KEY_DIR = os.environ.get("JWT_KEY_DIR", "")
+# the single key pair used without JWT_KEY_DIR, as JWT_DEFAULT_KID
+JWT_LEGACY_KEY_PATH = f"/usr/app/jwt{os.environ['SERVER_NAME']}RS384.key"
+# kid of the tokens issued without one
+JWT_DEFAULT_KID = os.environ.get("JWT_DEFAULT_KID", "default")
+# kid of the key new tokens are signed with (default: the newest private key)
+JWT_ACTIVE_KID = os.environ.get("JWT_ACTIVE_KID", "")
+# Algorithms of the keys tokens are signed & verified with (RS384, ES256 and/or EdDSA),
+# list several to accept tokens signed with either while migrating
+JWT_ALGORITHMS = os.environ.get("JWT_ALGORITHMS", "RS384").split()
+# Seconds between checks for added, removed or modified key files
+JWT_KEY_RELOAD_INTERVAL = int(os.environ.get("JWT_KEY_RELOAD_INTERVAL", 10))
+
+# Processes login password checks run in & max. number of checks waiting for them
+# (see authentication.passwords)
+LOGIN_HASH_WORKERS = int(os.environ.get("LOGIN_HASH_WORKERS", 2))
+LOGIN_MAX_PENDING = int(os.environ.get("LOGIN_MAX_PENDING", 32))
+
+# Revoked tokens (see authentication.revocation): the number of them the Bloom filter is
+# sized for (it grows as needed) & its false positive rate, seconds between refreshes of
+# the newly revoked tokens & between full rebuilds (which drop expired revocations)
+TOKEN_REVOCATION_CAPACITY = int(os.environ.get("TOKEN_REVOCATION_CAPACITY", 100000))
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+TOKEN_REVOCATION_REFRESH_INTERVAL = int(
+    os.environ.get("TOKEN_REVOCATION_REFRESH_INTERVAL", 10)
+)
+TOKEN_REVOCATION_REBUILD_INTERVAL = 3600
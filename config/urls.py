@@ -1,20 +1,29 @@
 """Elixir project URLs."""
 
+from django.conf import settings
 from django.urls import include, path
 
 from common.utils import error404
+from common.views import get_search_cache_stats
 
 handler404 = error404
 
+# service -> (URL prefix, URL module), only the services of this server are mounted
+SERVICE_URLS = {
+    "AUTH": ("auth/", "authentication.urls"),
+    "FACILITY": ("facility/", "facility.urls"),
+    "INDEX": ("index/", "index.urls"),
+}
+
+api_urls = [
+    path(prefix, include(module))
+    for service, (prefix, module) in SERVICE_URLS.items()
+    if service in settings.SERVER_SERVICES
+]
+# the search result cache is shared by the services with searches (see common.search_cache)
+if settings.SERVER_SERVICES & {"FACILITY", "INDEX"}:
+    api_urls.append(path("search/cache/", get_search_cache_stats))
+
 urlpatterns = [
-    path(
-        "api/",
-        include(
-            [
-                path("auth/", include("authentication.urls")),
-                path("facility/", include("facility.urls")),
-                path("index/", include("index.urls")),
-            ]
-        ),
-    ),
+    path("api/", include(api_urls)),
 ]
@@ -0,0 +1,53 @@
+"""Management command to export the coding tables into a terminology snapshot."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common.middleware import require_service
+from facility.models import HCPCS, ICD10, LOINC, RxTerm, TerminologyVersion
+from facility.snapshot import write_snapshot
+from facility.terminology import encoder
+
+SNAPSHOT_MODELS = [ICD10, LOINC, HCPCS, RxTerm]
+
+
+def encoded_rows(model):
+    """Yield the (code, pre-encoded JSON) of every *model* row."""
+    for obj in model.serializable().order_by("code").iterator(chunk_size=2000):
+        yield obj.code, encoder.encode(obj.serialize()).encode()
+
+
+class Command(BaseCommand):
+    """Management command to export the coding tables into a terminology snapshot."""
+
+    help = "Exports the coding tables into a memory-mappable terminology snapshot"
+
+    def add_arguments(self, parser) -> None:
+        """Add arguments to management command."""
+        parser.add_argument(
+            "--output",
+            default=settings.TERMINOLOGY_SNAPSHOT_PATH,
+            help="Snapshot path (default: settings.TERMINOLOGY_SNAPSHOT_PATH)",
+        )
+
+    @require_service("FACILITY")
+    def handle(self, *args, **kwargs):
+        """Process the command."""
+        version = (
+            TerminologyVersion.objects.order_by("-version")
+            .values_list("version", flat=True)
+            .first()
+        )
+        if version is None:
+            raise CommandError("The coding tables haven't been populated yet.")
+
+        write_snapshot(
+            kwargs["output"],
+            version,
+            {model._meta.label: encoded_rows(model) for model in SNAPSHOT_MODELS},
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Terminology snapshot (version {version}) exported to {kwargs['output']}."
+            )
+        )
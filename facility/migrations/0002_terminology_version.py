@@ -0,0 +1,36 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:10
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("facility", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TerminologyVersion",
+            fields=[
+                (
+                    "uuid",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("version", models.PositiveIntegerField(unique=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:15
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+SEARCH_FIELDS = {
+    "HCPCS": ["code", "description"],
+    "ICD10": ["code", "description", "category__title"],
+    "ICD10Category": ["code", "title"],
+    "LOINC": ["code", "component", "long_common_name"],
+    "RxTerm": ["code", "name"],
+}
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Compute the search vectors of existing rows."""
+    for model_name, fields in SEARCH_FIELDS.items():
+        model = apps.get_model("facility", model_name)
+        columns = [
+            # UPDATE can't join, read related columns through a correlated subquery
+            (
+                Subquery(model.objects.filter(pk=OuterRef("pk")).values(field)[:1])
+                if "__" in field
+                else field
+            )
+            for field in fields
+        ]
+        model.objects.update(search_vector=SearchVector(*columns))
+
+
+class Migration(migrations.Migration):
+    # the GIN indexes are built concurrently (without locking out writes)
+    atomic = False
+
+    dependencies = [
+        ("facility", "0002_terminology_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="hcpcs",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="icd10",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="icd10category",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="loinc",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="rxterm",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="hcpcs",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="hcpcs_search_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="icd10",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="icd10_search_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="icd10category",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="icd10category_search_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="loinc",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="loinc_search_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="rxterm",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="rxterm_search_idx"
+            ),
+        ),
+    ]
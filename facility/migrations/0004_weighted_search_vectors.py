@@ -0,0 +1,40 @@
+from functools import reduce
+from operator import add
+
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+SEARCH_FIELDS = {
+    "HCPCS": {"code": "A", "description": "B"},
+    "ICD10": {"code": "A", "description": "B", "category__title": "C"},
+    "ICD10Category": {"code": "A", "title": "B"},
+    "LOINC": {"code": "A", "component": "B", "long_common_name": "B"},
+    "RxTerm": {"code": "A", "name": "B"},
+}
+
+
+def weigh_search_vectors(apps, schema_editor):
+    """Recompute the search vectors of existing rows with their field weights."""
+    for model_name, weights in SEARCH_FIELDS.items():
+        model = apps.get_model("facility", model_name)
+        vectors = []
+        for field, weight in weights.items():
+            if "__" in field:
+                # UPDATE can't join, read related columns through a correlated subquery
+                field = Subquery(
+                    model.objects.filter(pk=OuterRef("pk")).values(field)[:1]
+                )
+            vectors.append(SearchVector(field, weight=weight))
+        model.objects.update(search_vector=reduce(add, vectors))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("facility", "0003_search_vectors"),
+    ]
+
+    operations = [
+        migrations.RunPython(weigh_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:19
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # the GIN indexes are built concurrently (without locking out writes)
+    atomic = False
+
+    dependencies = [
+        ("facility", "0004_weighted_search_vectors"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="hcpcs",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["code"], name="hcpcs_code_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="hcpcs",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["description"],
+                name="hcpcs_text_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="icd10",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["code"], name="icd10_code_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="icd10",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["description"],
+                name="icd10_text_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="loinc",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["code"], name="loinc_code_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="loinc",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["long_common_name"],
+                name="loinc_text_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="rxterm",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["code"], name="rxterm_code_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="rxterm",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="rxterm_text_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
@@ -3,11 +3,13 @@
 import os
 import threading
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.db import models
 from django.utils import timezone
 
 from common.constants import DISCHARGE_TYPES, ENCOUNTER_STATUS, VISIT_TYPES
-from common.models import BaseModel
+from common.models import BaseModel, Searchable
 
 index_base_url = (
     "http://"
@@ -20,7 +22,84 @@ index_base_url = (
 # Coding
 
 
-class LOINC(BaseModel):
+class TerminologyVersion(BaseModel):
+    """
+    TerminologyVersion model.
+
+    A new version is recorded whenever the coding tables are (re)populated, the tables
+    are read-only in between so anything derived from them can be cached per version.
+    """
+
+    version = models.PositiveIntegerField(unique=True)
+
+    SERIALIZATION_FIELDS = ["uuid", "version", "created"]
+
+    @classmethod
+    def bump(cls):
+        """Record a new terminology version."""
+        latest = cls.objects.aggregate(models.Max("version"))["version__max"] or 0
+        return cls.objects.create(version=latest + 1)
+
+
+def trigram_indexes(model_name, text_field):
+    """Return the pg_trgm indexes read by Coding.autocomplete (code & text columns)."""
+    return [
+        GinIndex(
+            fields=["code"],
+            opclasses=["gin_trgm_ops"],
+            name=f"{model_name}_code_trgm_idx",
+        ),
+        GinIndex(
+            fields=[text_field],
+            opclasses=["gin_trgm_ops"],
+            name=f"{model_name}_text_trgm_idx",
+        ),
+    ]
+
+
+class Coding(Searchable, BaseModel):
+    """Abstract model for the (read-only) coding tables."""
+
+    # Human readable column that autocomplete matches (by trigram word similarity)
+    AUTOCOMPLETE_FIELD = None
+    # Shorter queries only match code prefixes, they'd resemble too many rows otherwise
+    AUTOCOMPLETE_MIN_SIMILARITY_LENGTH = 3
+
+    class Meta:  # noqa
+        abstract = True
+        indexes = [GinIndex(fields=["search_vector"], name="%(class)s_search_idx")]
+
+    @classmethod
+    def normalize_code(cls, query):
+        """Return *query* in the format the code column is stored in."""
+        return query.upper()
+
+    @classmethod
+    def autocomplete(cls, query):
+        """
+        Return the rows matching a partially typed code or (misspelled) text, best first.
+
+        Code prefix matches come first, then rows ordered by how closely a word of their
+        AUTOCOMPLETE_FIELD resembles *query* (pg_trgm.word_similarity_threshold).
+        """
+        code = models.Q(code__startswith=cls.normalize_code(query))
+        if len(query) < cls.AUTOCOMPLETE_MIN_SIMILARITY_LENGTH:
+            return cls.objects.filter(code).order_by("code")
+
+        text = cls.AUTOCOMPLETE_FIELD
+        return (
+            cls.objects.filter(
+                code | models.Q(**{f"{text}__trigram_word_similar": query})
+            )
+            .annotate(
+                is_prefix=models.ExpressionWrapper(code, models.BooleanField()),
+                similarity=TrigramWordSimilarity(query, text),
+            )
+            .order_by("-is_prefix", "-similarity", "code")
+        )
+
+
+class LOINC(Coding):
     """
     Logical Observation Identifiers Names and Codes.
 
@@ -51,6 +130,8 @@ class LOINC(BaseModel):
     long_common_name = models.TextField()
     status = models.CharField(choices=LOINC_STATUS, max_length=16)
 
+    SEARCH_FIELDS = {"code": "A", "component": "B", "long_common_name": "B"}
+    AUTOCOMPLETE_FIELD = "long_common_name"
     SERIALIZATION_FIELDS = [
         "uuid",
         "code",
@@ -64,6 +145,9 @@ class LOINC(BaseModel):
         "status",
     ]
 
+    class Meta(Coding.Meta):  # noqa
+        indexes = Coding.Meta.indexes + trigram_indexes("loinc", "long_common_name")
+
     @property
     def fully_specified_name(self) -> str:
         """Return the fully specified name for this LOINC code."""
@@ -77,13 +161,14 @@ class LOINC(BaseModel):
         return f"{self.fully_specified_name} ({self.uuid})"
 
 
-class ICD10Category(BaseModel):
+class ICD10Category(Coding):
     """ICD10 Category model."""
 
     # category code
     code = models.CharField(max_length=16, unique=True)
     title = models.TextField()
 
+    SEARCH_FIELDS = {"code": "A", "title": "B"}
     SERIALIZATION_FIELDS = ["uuid", "code", "title"]
 
     def __str__(self) -> str:
@@ -91,7 +176,7 @@ class ICD10Category(BaseModel):
         return f"{self.code} {self.title} ({self.uuid})"
 
 
-class ICD10(BaseModel):
+class ICD10(Coding):
     """
     International Classification of Diseases (ICD).
 
@@ -103,14 +188,24 @@ class ICD10(BaseModel):
     code = models.CharField(max_length=16, unique=True)
     description = models.TextField()
 
+    SEARCH_FIELDS = {"code": "A", "description": "B", "category__title": "C"}
+    AUTOCOMPLETE_FIELD = "description"
     SERIALIZATION_FIELDS = ["uuid", "code", "description", "category"]
 
+    class Meta(Coding.Meta):  # noqa
+        indexes = Coding.Meta.indexes + trigram_indexes("icd10", "description")
+
+    @classmethod
+    def normalize_code(cls, query):
+        """Return *query* in the format ICD10 codes are stored in (e.g. "J45.9" -> "J459")."""
+        return query.upper().replace(".", "")
+
     def __str__(self) -> str:
         """Return the string representation of the ICD10 code."""
         return f"{self.category.code} {self.code} {self.description} ({self.uuid})"
 
 
-class HCPCS(BaseModel):
+class HCPCS(Coding):
     """
     Healthcare Common Procedure Coding System (HCPCS).
 
@@ -123,14 +218,19 @@ class HCPCS(BaseModel):
     description = models.TextField()
     status_code = models.CharField(max_length=4)
 
+    SEARCH_FIELDS = {"code": "A", "description": "B"}
+    AUTOCOMPLETE_FIELD = "description"
     SERIALIZATION_FIELDS = ["uuid", "code", "description", "status_code"]
 
+    class Meta(Coding.Meta):  # noqa
+        indexes = Coding.Meta.indexes + trigram_indexes("hcpcs", "description")
+
     def __str__(self) -> str:
         """Return the string representation of the HCPCS code."""
         return f"{self.code} {self.description} {self.status_code} ({self.uuid})"
 
 
-class RxTerm(BaseModel):
+class RxTerm(Coding):
     """
     RxTerms.
 
@@ -145,8 +245,13 @@ class RxTerm(BaseModel):
     strength = models.CharField(max_length=256)
     form = models.CharField(max_length=64)
 
+    SEARCH_FIELDS = {"code": "A", "name": "B"}
+    AUTOCOMPLETE_FIELD = "name"
     SERIALIZATION_FIELDS = ["uuid", "code", "name", "route", "strength", "form"]
 
+    class Meta(Coding.Meta):  # noqa
+        indexes = Coding.Meta.indexes + trigram_indexes("rxterm", "name")
+
     def __str__(self):
         """Return the string representation of the RxTerm code."""
         return f"{self.name} {self.strength} {self.form} ({self.uuid})"
@@ -0,0 +1,82 @@
+"""Script to benchmark the in-memory terminology search index against Postgres."""
+
+import csv
+import statistics
+import time
+import tracemalloc
+
+from django.db import transaction
+from django.test.utils import override_settings
+
+from common.utils import Page, count_hits
+from facility.models import HCPCS, TerminologyVersion
+from facility.scripts.populate_coding_tables import HCPCS_SOURCE_CSV
+from facility.search_index import TableIndex, terminology_index
+from facility.terminology import get_serialized_rows
+
+QUERIES = ["consultation", "office visit", "ambulance", "x-ray chest", "injection"]
+LIMIT = 20
+REPEAT = 200
+
+
+def search_db(query):
+    """Search HCPCS the way common.utils.search_table does without the index."""
+    results = HCPCS.search(query)
+    page = Page(results.only("uuid"), ["-rank", "uuid"], LIMIT)
+    uuids = [result.uuid for result in page]
+    return get_serialized_rows(HCPCS, uuids), count_hits(results)
+
+
+def search_memory(query):
+    """Search HCPCS with the in-memory index."""
+    return terminology_index.search(HCPCS, query, LIMIT)
+
+
+def benchmark(label, search):
+    """Print the median & p99 latency of *search* over QUERIES."""
+    timings = []
+    for _ in range(REPEAT):
+        for query in QUERIES:
+            start = time.perf_counter()
+            search(query)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(
+        f"{label:>8}: median {statistics.median(timings) * 1000:6.2f} ms, "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1000:6.2f} ms"
+    )
+
+
+def run():
+    """Run the benchmark_search_index script (the sample rows are rolled back)."""
+    with transaction.atomic(), override_settings(TERMINOLOGY_SEARCH_INDEX=True):
+        with open(HCPCS_SOURCE_CSV, "r") as f:
+            codes = {}
+            for row in csv.DictReader(f):
+                code = row["HCPCS"].strip()
+                if row["MOD"].strip():
+                    code += f"-{row['MOD'].strip()}"
+                codes[code] = HCPCS(
+                    code=code,
+                    description=row["DESCRIPTION"].strip(),
+                    status_code=row["STATUS CODE"].strip(),
+                )
+        HCPCS.objects.bulk_create(codes.values(), ignore_conflicts=True)
+        HCPCS.update_search_vectors()
+        TerminologyVersion.bump()
+
+        tracemalloc.start()
+        table = TableIndex(HCPCS).load(set())
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"HCPCS x {len(table.uuids)}: {len(table.postings)} lexemes, "
+            f"{memory / 2**20:.1f} MiB (incl. pre-encoded rows)"
+        )
+
+        terminology_index.build()
+        benchmark("postgres", search_db)
+        benchmark("memory", search_memory)
+
+        transaction.set_rollback(True)
+    terminology_index.state = None
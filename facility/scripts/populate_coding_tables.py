@@ -2,9 +2,12 @@
 
 import csv
 
+from django.core.management import call_command
 from tqdm import tqdm
 
-from facility.models import HCPCS, ICD10, LOINC, ICD10Category, RxTerm
+from common.models import deferred_search_vectors
+from facility.models import (HCPCS, ICD10, LOINC, ICD10Category, RxTerm,
+                             TerminologyVersion)
 
 # Data obtained from
 # https://www.cms.gov/medicaremedicare-fee-service-paymentphysicianfeeschedpfs-relative-value-files/rvu22b
@@ -24,6 +27,17 @@ RXTERMS_SOURCE_CSV = "facility/scripts/data/RxTerms202201.csv"
 
 def run():
     """Run populate_coding_tables script."""
+    # the search vectors are computed once per table instead of once per row
+    with deferred_search_vectors(HCPCS, ICD10Category, ICD10, LOINC, RxTerm):
+        populate()
+
+    version = TerminologyVersion.bump()
+    print(f"Coding tables populated (terminology version {version.version}).")
+    call_command("export_terminology_snapshot")
+
+
+def populate():
+    """Populate the coding tables from the source CSVs."""
     print(f"Populating HCPCS table from {HCPCS_SOURCE_CSV}...")
     with open(HCPCS_SOURCE_CSV, "r") as f:
         rows = list(csv.DictReader(f))
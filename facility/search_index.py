@@ -0,0 +1,276 @@
+"""
+This module houses an optional in-process full text index of the coding tables.
+
+The coding tables are read-only between populate_coding_tables runs, so each worker can
+answer searches from memory instead of Postgres. The index is built from the stored
+search vectors (so it matches the same lexemes as search_vector @@ plainto_tsquery())
+and is rebuilt in the background whenever the terminology version changes.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, TextField
+from django.db.models.functions import Cast
+
+from common.cache import LRUCache
+
+from .models import HCPCS, ICD10, LOINC, RxTerm
+from .terminology import current_version, encoder, get_snapshot
+
+logger = logging.getLogger(__name__)
+
+# ts_rank()'s default weights of A, B, C & D lexemes
+WEIGHTS = (1.0, 0.4, 0.2, 0.1)
+WEIGHT_INDEXES = {"A": 0, "B": 1, "C": 2, "D": 3}
+# 'lexeme':1A,5B in the text representation of a tsvector (no letter means D)
+TSVECTOR_RE = re.compile(r"'((?:[^']|'')+)'(?::([0-9A-D,]+))?")
+# Number of words whose lexemes are looked up per query while building the vocabulary
+VOCABULARY_BATCH_SIZE = 10000
+# Max. number of query words (not found in the coding tables) whose lexemes are cached
+VOCABULARY_CACHE_SIZE = 10000
+# Min. number of seconds between a failed build of the index & the next attempt (unless
+# the terminology version changes)
+BUILD_RETRY_INTERVAL = 300
+# First value of the cursors of pages served from memory, their scores aren't ts_rank
+# values so they can't be continued by Postgres (and Postgres cursors aren't continued here)
+CURSOR_TAG = "index"
+
+
+def is_index_cursor(cursor):
+    """Return whether a (decoded) cursor was issued by the in-memory index."""
+    return cursor is not None and len(cursor) == 3 and cursor[0] == CURSOR_TAG
+
+
+def parse_tsvector(text):
+    """Return a {lexeme: best weight index} dict of the text of a tsvector."""
+    lexemes = {}
+    for match in TSVECTOR_RE.finditer(text):
+        lexeme = match.group(1).replace("''", "'").replace("\\\\", "\\")
+        positions = match.group(2) or "D"
+        lexemes[lexeme] = min(
+            WEIGHT_INDEXES.get(position[-1], 3) for position in positions.split(",")
+        )
+    return lexemes
+
+
+def to_lexemes(words):
+    """Return a {word: lexemes} dict of what Postgres makes of each (whitespace free) word."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT word, to_tsvector(word)::text FROM unnest(%s::text[]) AS word",
+            [list(words)],
+        )
+        return {word: tuple(parse_tsvector(vector)) for word, vector in cursor}
+
+
+class TableIndex:
+    """An inverted index (lexeme -> postings) of one coding table."""
+
+    def __init__(self, model):  # noqa
+        self.model = model
+        # row id -> uuid & pre-encoded JSON of the row (row ids are in uuid order), the
+        # JSON is read from the (shared) terminology snapshot instead if there is one,
+        # rows missing from it are encoded (their location's length is 0)
+        self.uuids = []
+        self.fragments = []
+        self.snapshot = None
+        self.locations = (array("Q"), array("I"))
+        self.unlocated = {}
+        # lexeme -> (row ids, weight indexes) as compact, row id ordered arrays
+        self.postings = {}
+
+    def load(self, words, snapshot=None):
+        """Read the table's rows & search vectors, adding the words of its text to *words*."""
+        if snapshot is not None and self.model in snapshot:
+            self.snapshot = snapshot
+        text_fields = list(self.model.SEARCH_FIELDS)
+        rows = (
+            self.model.serializable()
+            .order_by("uuid")
+            .annotate(search_text=Cast("search_vector", TextField()))
+            .annotate(**{f"_text_{i}": F(field) for i, field in enumerate(text_fields)})
+        )
+        for row_id, obj in enumerate(rows.iterator(chunk_size=2000)):
+            self.uuids.append(str(obj.uuid))
+            if self.snapshot is None:
+                self.fragments.append(encoder.encode(obj.serialize()).encode())
+            else:
+                location = self.snapshot.locate(self.model, obj.code)
+                if location is None:
+                    self.unlocated[row_id] = encoder.encode(obj.serialize()).encode()
+                    location = (0, 0)
+                self.locations[0].append(location[0])
+                self.locations[1].append(location[1])
+            for lexeme, weight in parse_tsvector(obj.search_text or "").items():
+                postings = self.postings.get(lexeme)
+                if postings is None:
+                    postings = self.postings[lexeme] = (array("I"), array("B"))
+                postings[0].append(row_id)
+                postings[1].append(weight)
+            for i in range(len(text_fields)):
+                words.update(str(getattr(obj, f"_text_{i}") or "").lower().split())
+        return self
+
+    def fragment(self, row):
+        """Return the pre-encoded JSON of a row."""
+        if self.snapshot is None:
+            return self.fragments[row]
+        if self.locations[1][row] == 0:
+            return self.unlocated[row]
+        return self.snapshot.read(self.locations[0][row], self.locations[1][row])
+
+    def match(self, lexemes):
+        """Return a {row id: score} dict of the rows containing all of *lexemes*."""
+        postings = [self.postings.get(lexeme) for lexeme in lexemes]
+        if not postings or None in postings:
+            return {}
+        postings.sort(key=lambda p: len(p[0]))
+        rows, weights = postings[0]
+        scores = {row: WEIGHTS[weight] for row, weight in zip(rows, weights)}
+        for rows, weights in postings[1:]:
+            matched = {}
+            for row, score in scores.items():
+                i = bisect_left(rows, row)
+                if i < len(rows) and rows[i] == row:
+                    matched[row] = score + WEIGHTS[weights[i]]
+            scores = matched
+            if not scores:
+                break
+        return scores
+
+
+class TerminologySearchIndex:
+    """
+    In-memory full text search over the coding tables (see settings.TERMINOLOGY_SEARCH_INDEX).
+
+    Results are ordered by the sum of the (ts_rank default) weights of the matched lexemes,
+    an approximation of ts_rank. search() returns None (the caller should query Postgres)
+    while the index is being (re)built & for pages after Postgres cursors.
+    """
+
+    MODELS = (ICD10, LOINC, HCPCS, RxTerm)
+
+    def __init__(self):  # noqa
+        # (terminology version, {model: TableIndex}, {word: lexemes}), swapped atomically
+        self.state = None
+        self.unknown_words = LRUCache(VOCABULARY_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._building = False
+        # (terminology version, time.monotonic()) of the last failed build
+        self._failed = None
+
+    def build(self):
+        """Build the index of every coding table & swap it in."""
+        version = current_version()
+        snapshot = get_snapshot()
+        words = set()
+        tables = {model: TableIndex(model).load(words, snapshot) for model in self.MODELS}
+        # the lexemes of every word of the coding tables, so queries made up of them
+        # can be parsed without a round trip to Postgres
+        vocabulary, words = {}, list(words)
+        for start in range(0, len(words), VOCABULARY_BATCH_SIZE):
+            end = start + VOCABULARY_BATCH_SIZE
+            vocabulary.update(to_lexemes(words[start:end]))
+        self.state = (version, tables, vocabulary)
+        self.unknown_words.clear()
+        logger.info("Terminology search index (version %s) loaded.", version)
+
+    def _build_in_background(self, version):
+        """Start building the index in a background thread (unless one is running)."""
+        with self._lock:
+            if self._building:
+                return
+            if self._failed is not None and self._failed[0] == version and (
+                time.monotonic() - self._failed[1] < BUILD_RETRY_INTERVAL
+            ):
+                return  # searches are served by Postgres until the next attempt
+            self._building = True
+
+        def build():
+            try:
+                self.build()
+                self._failed = None
+            except Exception:
+                logger.exception("Failed to build the terminology search index.")
+                self._failed = (version, time.monotonic())
+            finally:
+                self._building = False
+                connection.close()
+
+        threading.Thread(target=build, daemon=True).start()
+
+    def get_state(self):
+        """Return the current state (None if it's missing or out of date)."""
+        state, version = self.state, current_version()
+        if state is None or state[0] != version:
+            self._build_in_background(version)
+            return None
+        return state
+
+    def lexemes(self, vocabulary, query):
+        """Return the lexemes of a plain text *query* (like plainto_tsquery)."""
+        lexemes = set()
+        unknown = []
+        for word in query.lower().split():
+            word_lexemes = vocabulary.get(word)
+            if word_lexemes is None:
+                word_lexemes = self.unknown_words.get(word)
+            if word_lexemes is None:
+                unknown.append(word)
+            else:
+                lexemes.update(word_lexemes)
+        if unknown:  # words that don't occur in the coding tables, e.g. plurals
+            for word, word_lexemes in to_lexemes(unknown).items():
+                self.unknown_words.set(word, word_lexemes)
+                lexemes.update(word_lexemes)
+        return lexemes
+
+    def search(self, model, query, limit, cursor=None):
+        """
+        Return a (fragments, next_cursor, hits) page of the *model* rows matching *query*.
+
+        Cursors hold CURSOR_TAG & the (score, uuid) of the last row of the previous page,
+        pages after other cursors aren't served from memory.
+        """
+        if not settings.TERMINOLOGY_SEARCH_INDEX or model not in self.MODELS:
+            return None
+        if cursor is not None and not is_index_cursor(cursor):
+            return None
+        state = self.get_state()
+        if state is None:
+            return None
+        _, tables, vocabulary = state
+        table = tables[model]
+
+        lexemes = self.lexemes(vocabulary, query)
+        scores = table.match(lexemes) if lexemes else {}
+        hits = {"total": len(scores), "relation": "eq"}
+        if len(scores) > settings.SEARCH_MAX_TOTAL_HITS:
+            hits = {"total": settings.SEARCH_MAX_TOTAL_HITS, "relation": "gte"}
+
+        # the same (-rank, uuid) order as common.utils.search_table
+        keys = ((-score, table.uuids[row], row) for row, score in scores.items())
+        if cursor is not None:
+            try:
+                after = (-float(cursor[1]), str(cursor[2]))
+            except (TypeError, ValueError):
+                raise ValueError("Malformed cursor.")
+            keys = (key for key in keys if key[:2] > after)
+        page = heapq.nsmallest(limit + 1, keys)
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = [CURSOR_TAG, -page[-1][0], page[-1][1]]
+        return [table.fragment(row) for _, _, row in page], next_cursor, hits
+
+
+terminology_index = TerminologySearchIndex()
@@ -0,0 +1,125 @@
+"""
+This module houses the binary snapshot format of the coding tables.
+
+A snapshot holds the pre-encoded JSON of every row of the exported coding tables, plus a
+code -> (offset, length) index per table sorted by code. Workers read it through mmap, so
+they share a single page cache copy of the tables & look codes up without a DB query.
+
+Layout (little endian):
+    header      magic, format version, terminology version, table count
+    directory   per table: label, row count, index offset, data offset
+    per table   data (the concatenated rows) followed by its index entries
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+
+MAGIC = b"TERMSNAP"
+FORMAT_VERSION = 1
+CODE_SIZE = 16  # the max_length of Coding.code columns
+
+HEADER = struct.Struct(f"<{len(MAGIC)}sHIH")
+TABLE = struct.Struct("<16sIQQ")
+ENTRY = struct.Struct(f"<{CODE_SIZE}sQI")
+
+
+def _pack_code(code):
+    """Return *code* as the fixed-size (NUL padded) bytes stored in index entries."""
+    code = code.encode()
+    if len(code) > CODE_SIZE:
+        raise ValueError(f"Code {code!r} is longer than {CODE_SIZE} bytes.")
+    return code.ljust(CODE_SIZE, b"\0")
+
+
+def write_snapshot(path, version, tables):
+    """
+    Write a snapshot of *tables* ({label: iterable of (code, encoded row)}) to *path*.
+
+    The file is written next to *path* & moved into place, so readers never see a
+    partially written snapshot.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, len(tables)))
+            f.write(b"\0" * TABLE.size * len(tables))
+
+            entries_by_table = []
+            for label, rows in tables.items():
+                data_offset = f.tell()
+                entries = []
+                for code, fragment in rows:
+                    entries.append((_pack_code(code), f.tell(), len(fragment)))
+                    f.write(fragment)
+                index_offset = f.tell()
+                for entry in sorted(entries):
+                    f.write(ENTRY.pack(*entry))
+                entries_by_table.append(
+                    (label.encode(), len(entries), index_offset, data_offset)
+                )
+
+            f.seek(HEADER.size)
+            for table in entries_by_table:
+                f.write(TABLE.pack(*table))
+        os.chmod(temp_path, 0o644)  # mkstemp() creates files only the owner can read
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class TerminologySnapshot:
+    """A read-only, memory-mapped terminology snapshot."""
+
+    def __init__(self, path):  # noqa
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, self.version, table_count = HEADER.unpack_from(
+            self._mmap, 0
+        )
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a (version {FORMAT_VERSION}) snapshot.")
+        # label -> (row count, index offset)
+        self.tables = {}
+        for i in range(table_count):
+            label, rows, index_offset, _ = TABLE.unpack_from(
+                self._mmap, HEADER.size + i * TABLE.size
+            )
+            self.tables[label.rstrip(b"\0").decode()] = (rows, index_offset)
+
+    def __contains__(self, model):  # noqa
+        return model._meta.label in self.tables
+
+    def locate(self, model, code):
+        """Return the (offset, length) of the *model* row with *code* (None if missing)."""
+        rows, index_offset = self.tables[model._meta.label]
+        try:
+            key = _pack_code(code)
+        except ValueError:
+            return None
+        low, high = 0, rows
+        while low < high:  # binary search of the sorted index entries
+            middle = (low + high) // 2
+            entry_code, offset, length = ENTRY.unpack_from(
+                self._mmap, index_offset + middle * ENTRY.size
+            )
+            if entry_code < key:
+                low = middle + 1
+            elif entry_code > key:
+                high = middle
+            else:
+                return offset, length
+        return None
+
+    def read(self, offset, length):
+        """Return the encoded row at *offset*."""
+        return self._mmap[offset : offset + length]  # noqa: E203
+
+    def get(self, model, code):
+        """Return the encoded *model* row with *code* (None if missing)."""
+        location = self.locate(model, code)
+        return None if location is None else self.read(*location)
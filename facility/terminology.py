@@ -0,0 +1,88 @@
+"""This module houses per-worker caches of the (read-only) coding tables."""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from common.cache import VersionedLRUCache
+
+from .models import TerminologyVersion
+from .snapshot import TerminologySnapshot
+
+encoder = DjangoJSONEncoder()
+# Pre-encoded JSON of coding table rows, keyed by (model, uuid)
+serialized_rows = VersionedLRUCache(settings.CODING_CACHE_SIZE)
+
+_version = {"value": None, "checked": float("-inf")}
+_snapshot = {"value": None, "path": None, "mtime": None}
+
+
+def current_version():
+    """Return the current terminology version (re-read from the DB every so often)."""
+    now = time.monotonic()
+    if now - _version["checked"] > settings.TERMINOLOGY_VERSION_CHECK_INTERVAL:
+        _version["value"] = (
+            TerminologyVersion.objects.order_by("-version")
+            .values_list("version", flat=True)
+            .first()
+        )
+        _version["checked"] = now
+    return _version["value"]
+
+
+def get_serialized_rows(model, uuids):
+    """Return the pre-encoded JSON of the *model* rows with *uuids* (in the same order)."""
+    serialized_rows.validate(current_version())
+    fragments = {uuid: serialized_rows.get((model, uuid)) for uuid in uuids}
+
+    missing = [uuid for uuid, fragment in fragments.items() if fragment is None]
+    if missing:
+        for obj in model.serializable(model.objects.filter(uuid__in=missing)):
+            fragment = encoder.encode(obj.serialize()).encode()
+            serialized_rows.set((model, obj.uuid), fragment)
+            fragments[obj.uuid] = fragment
+
+    return [fragments[uuid] for uuid in uuids if fragments[uuid] is not None]
+
+
+def get_snapshot():
+    """Return the memory-mapped snapshot of the current terminology version (or None)."""
+    path = settings.TERMINOLOGY_SNAPSHOT_PATH
+    version = current_version()
+    snapshot = _snapshot["value"]
+    if snapshot is not None and snapshot.version == version and _snapshot["path"] == path:
+        return snapshot
+
+    # (re)open the snapshot if it has been exported since it was last opened
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if (path, mtime) != (_snapshot["path"], _snapshot["mtime"]):
+        _snapshot["path"], _snapshot["mtime"] = path, mtime
+        try:
+            snapshot = _snapshot["value"] = TerminologySnapshot(path)
+        except (OSError, ValueError):
+            snapshot = _snapshot["value"] = None
+    if snapshot is None or snapshot.version != version:
+        return None
+    return snapshot
+
+
+def resolve_codes(model, codes):
+    """Return a {code: pre-encoded JSON} dict of the *model* rows with *codes*."""
+    snapshot = get_snapshot()
+    if snapshot is not None and model in snapshot:
+        fragments = {code: snapshot.get(model, code) for code in codes}
+        return {code: fragment for code, fragment in fragments.items() if fragment is not None}
+
+    rows = model.serializable(model.objects.filter(code__in=set(codes)))
+    return {obj.code: encoder.encode(obj.serialize()).encode() for obj in rows}
+
+
+def get_coded_rows(model, codes):
+    """Return the pre-encoded JSON of the *model* rows with *codes* (skipping missing ones)."""
+    fragments = resolve_codes(model, codes)
+    return [fragments[code] for code in codes if code in fragments]
@@ -5,12 +5,26 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path("search/", views.search_codings),
     path("icd10/search/", views.search_icd10),
+    path("icd10/autocomplete/", views.autocomplete_icd10),
     path("loinc/search/", views.search_loinc),
+    path("loinc/autocomplete/", views.autocomplete_loinc),
     path("loinc/arrival-measurements/", views.get_arrival_measurements),
     path("hcpcs/search/", views.search_hcpcs),
+    path("hcpcs/autocomplete/", views.autocomplete_hcpcs),
     path("hcpcs/consultation-codes/", views.get_consultation_codes),
     path("rxterm/search/", views.search_rxterm),
+    path("rxterm/autocomplete/", views.autocomplete_rxterm),
+    path("icd10/resolve/", views.resolve_icd10),
+    path("loinc/resolve/", views.resolve_loinc),
+    path("hcpcs/resolve/", views.resolve_hcpcs),
+    path("rxterm/resolve/", views.resolve_rxterm),
+    # exact codes last, so they don't shadow the other coding table paths
+    path("icd10/<str:code>/", views.get_icd10),
+    path("loinc/<str:code>/", views.get_loinc),
+    path("hcpcs/<str:code>/", views.get_hcpcs),
+    path("rxterm/<str:code>/", views.get_rxterm),
     path("visits/new/", views.create_visit),
     path("visits/<uuid:visit_id>/", views.get_visit),
 ]
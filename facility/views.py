@@ -1,16 +1,18 @@
 """This module houses API endpoints for the facility app."""
 
+import json
 import os
 
-from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
 from common.middleware import require_roles, require_service
-from common.payload import create_success_payload
-from common.utils import create, search_table
+from common.payload import create_raw_success_payload, create_success_payload
+from common.utils import (autocomplete_table, create, resolve_table, retrieve,
+                          retrieve_code, search_table, search_tables)
 
 from .models import HCPCS, ICD10, LOINC, RxTerm, Visit
+from .terminology import get_coded_rows
 
 index_base_url = (
     "http://"
@@ -30,7 +32,7 @@ index_base_url = (
 @require_service("FACILITY")
 def search_icd10(request):
     """Search for an ICD10 code."""
-    return search_table(ICD10, ["code", "description", "category__title"], request)
+    return search_table(ICD10, request)
 
 
 @require_roles(["PRACTITIONER"])
@@ -39,7 +41,7 @@ def search_icd10(request):
 @require_service("FACILITY")
 def search_loinc(request):
     """Search for a LOINC code."""
-    return search_table(LOINC, ["code", "component", "long_common_name"], request)
+    return search_table(LOINC, request)
 
 
 @require_roles(["PRACTITIONER"])
@@ -48,10 +50,11 @@ def search_loinc(request):
 @require_service("FACILITY")
 def get_arrival_measurements(request):
     """Get LOINC codes for vital signs measurements."""
-    codes = LOINC.objects.filter(
-        code__in=["3141-9", "3137-7", "8310-5", "8480-6", "8462-4", "8867-4", "9279-1"]
-    ).order_by("long_common_name")
-    return create_success_payload([code.serialize() for code in codes])
+    fragments = get_coded_rows(
+        LOINC, ["3141-9", "3137-7", "8310-5", "8480-6", "8462-4", "8867-4", "9279-1"]
+    )
+    codes = [json.loads(fragment) for fragment in fragments]
+    return create_success_payload(sorted(codes, key=lambda code: code["long_common_name"]))
 
 
 @require_roles(["PRACTITIONER"])
@@ -60,8 +63,7 @@ def get_arrival_measurements(request):
 @require_service("FACILITY")
 def get_consultation_codes(request):
     """Get HCPCS codes for OP & IP consultation."""
-    codes = [HCPCS.objects.get(code="99241"), HCPCS.objects.get(code="99251")]  # OP, IP
-    return create_success_payload([code.serialize() for code in codes])
+    return create_raw_success_payload(get_coded_rows(HCPCS, ["99241", "99251"]))  # OP, IP
 
 
 @require_roles(["PRACTITIONER"])
@@ -70,7 +72,7 @@ def get_consultation_codes(request):
 @require_service("FACILITY")
 def search_hcpcs(request):
     """Search for a HCPCS code."""
-    return search_table(HCPCS, ["code", "description"], request)
+    return search_table(HCPCS, request)
 
 
 @require_roles(["PRACTITIONER"])
@@ -79,7 +81,124 @@ def search_hcpcs(request):
 @require_service("FACILITY")
 def search_rxterm(request):
     """Search for a RxTerm code."""
-    return search_table(RxTerm, ["code", "name"], request)
+    return search_table(RxTerm, request)
+
+
+@require_roles(["PRACTITIONER"])
+@csrf_exempt
+@require_POST
+@require_service("FACILITY")
+def search_codings(request):
+    """Run several coding table searches (e.g. for one form) in one request."""
+    return search_tables(
+        {"icd10": ICD10, "loinc": LOINC, "hcpcs": HCPCS, "rxterm": RxTerm}, request
+    )
+
+
+# Coding - Autocomplete
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+@require_service("FACILITY")
+def autocomplete_icd10(request):
+    """Suggest ICD10 codes for a partially typed code or description."""
+    return autocomplete_table(ICD10, request)
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+@require_service("FACILITY")
+def autocomplete_loinc(request):
+    """Suggest LOINC codes for a partially typed code or name."""
+    return autocomplete_table(LOINC, request)
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+@require_service("FACILITY")
+def autocomplete_hcpcs(request):
+    """Suggest HCPCS codes for a partially typed code or description."""
+    return autocomplete_table(HCPCS, request)
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+@require_service("FACILITY")
+def autocomplete_rxterm(request):
+    """Suggest RxTerm codes for a partially typed code or name."""
+    return autocomplete_table(RxTerm, request)
+
+
+# Coding - Exact codes
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+@require_service("FACILITY")
+def get_icd10(request, code):
+    """GET the ICD10 code with *code*."""
+    return retrieve_code(ICD10, code)
+
+
+@require_roles(["PRACTITIONER"])
+@csrf_exempt
+@require_POST
+@require_service("FACILITY")
+def resolve_icd10(request):
+    """Resolve a list of ICD10 codes (in the same order)."""
+    return resolve_table(ICD10, request)
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+@require_service("FACILITY")
+def get_loinc(request, code):
+    """GET the LOINC code with *code*."""
+    return retrieve_code(LOINC, code)
+
+
+@require_roles(["PRACTITIONER"])
+@csrf_exempt
+@require_POST
+@require_service("FACILITY")
+def resolve_loinc(request):
+    """Resolve a list of LOINC codes (in the same order)."""
+    return resolve_table(LOINC, request)
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+@require_service("FACILITY")
+def get_hcpcs(request, code):
+    """GET the HCPCS code with *code*."""
+    return retrieve_code(HCPCS, code)
+
+
+@require_roles(["PRACTITIONER"])
+@csrf_exempt
+@require_POST
+@require_service("FACILITY")
+def resolve_hcpcs(request):
+    """Resolve a list of HCPCS codes (in the same order)."""
+    return resolve_table(HCPCS, request)
+
+
+@require_roles(["PRACTITIONER"])
+@require_GET
+@require_service("FACILITY")
+def get_rxterm(request, code):
+    """GET the RxTerm code with *code*."""
+    return retrieve_code(RxTerm, code)
+
+
+@require_roles(["PRACTITIONER"])
+@csrf_exempt
+@require_POST
+@require_service("FACILITY")
+def resolve_rxterm(request):
+    """Resolve a list of RxTerm codes (in the same order)."""
+    return resolve_table(RxTerm, request)
 
 
 # Visits
@@ -100,5 +219,4 @@ def create_visit(request):
 @require_service("FACILITY")
 def get_visit(request, visit_id):
     """GET a visit."""
-    visit = get_object_or_404(Visit, uuid=visit_id)
-    return create_success_payload(visit.serialize())
+    return retrieve(Visit, request, uuid=visit_id)
@@ -0,0 +1,31 @@
+"""Management command to recompute the rating aggregates of records."""
+
+from django.core.management.base import BaseCommand
+
+from common.middleware import require_service
+from index.models import Record
+
+
+class Command(BaseCommand):
+    """Management command to recompute the rating aggregates of records."""
+
+    help = "Recomputes the rating count & sums of records from their RecordRatings"
+
+    def add_arguments(self, parser) -> None:
+        """Add arguments to management command."""
+        parser.add_argument(
+            "records", nargs="*", help="UUIDs of the records to repair (default: all)"
+        )
+
+    @require_service("INDEX")
+    def handle(self, *args, **kwargs):
+        """Process the command."""
+        records = Record.objects.all()
+        if kwargs["records"]:
+            records = records.filter(uuid__in=kwargs["records"])
+        updated = Record.recompute_ratings(records)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed the rating aggregates of {updated} records."
+            )
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="consentrequest",
+            index=models.Index(
+                fields=["created", "uuid"], name="consent_created_uuid_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="facility",
+            index=models.Index(fields=["name", "uuid"], name="facility_name_uuid_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="practitioner",
+            index=models.Index(
+                fields=["created", "uuid"], name="practitioner_created_uuid_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="record",
+            index=models.Index(
+                fields=["patient", "created", "uuid"], name="record_patient_created_idx"
+            ),
+        ),
+    ]
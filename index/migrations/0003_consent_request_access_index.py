@@ -0,0 +1,20 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0002_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="consentrequest",
+            index=models.Index(
+                fields=["record", "requestor", "status"],
+                name="consent_record_requestor_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:12
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    """Compute the rating aggregates of existing records."""
+    Record = apps.get_model("index", "Record")
+    RecordRating = apps.get_model("index", "RecordRating")
+    ratings = (
+        RecordRating.objects.filter(record=models.OuterRef("pk"))
+        .order_by()
+        .values("record")
+    )
+
+    def aggregate(expression):
+        return Coalesce(
+            models.Subquery(ratings.annotate(value=expression).values("value")), 0
+        )
+
+    Record.objects.update(
+        rating_count=aggregate(models.Count("uuid")),
+        accuracy_sum=aggregate(models.Sum("accuracy")),
+        completeness_sum=aggregate(models.Sum("completeness")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0003_consent_request_access_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="record",
+            name="accuracy_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="record",
+            name="completeness_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="record",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
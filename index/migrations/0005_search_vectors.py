@@ -0,0 +1,68 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:15
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+SEARCH_FIELDS = {
+    "Facility": ["name", "location", "county"],
+    "Practitioner": ["user__first_name", "user__last_name"],
+}
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Compute the search vectors of existing rows."""
+    for model_name, fields in SEARCH_FIELDS.items():
+        model = apps.get_model("index", model_name)
+        columns = [
+            # UPDATE can't join, read related columns through a correlated subquery
+            (
+                Subquery(model.objects.filter(pk=OuterRef("pk")).values(field)[:1])
+                if "__" in field
+                else field
+            )
+            for field in fields
+        ]
+        model.objects.update(search_vector=SearchVector(*columns))
+
+
+class Migration(migrations.Migration):
+    # the GIN indexes are built concurrently (without locking out writes)
+    atomic = False
+
+    dependencies = [
+        ("index", "0004_record_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="facility",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="practitioner",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="facility",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="facility_search_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="practitioner",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="practitioner_search_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from functools import reduce
+from operator import add
+
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+SEARCH_FIELDS = {
+    "Facility": {"name": "A", "location": "B", "county": "B"},
+    "Practitioner": {"user__first_name": "A", "user__last_name": "A"},
+}
+
+
+def weigh_search_vectors(apps, schema_editor):
+    """Recompute the search vectors of existing rows with their field weights."""
+    for model_name, weights in SEARCH_FIELDS.items():
+        model = apps.get_model("index", model_name)
+        vectors = []
+        for field, weight in weights.items():
+            if "__" in field:
+                # UPDATE can't join, read related columns through a correlated subquery
+                field = Subquery(
+                    model.objects.filter(pk=OuterRef("pk")).values(field)[:1]
+                )
+            vectors.append(SearchVector(field, weight=weight))
+        model.objects.update(search_vector=reduce(add, vectors))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0005_search_vectors"),
+    ]
+
+    operations = [
+        migrations.RunPython(weigh_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.1.10 on 2026-10-17 19:55
+
+from django.db import migrations, models
+
+from common.constants import counties_to_regions_map
+
+
+def backfill_regions(apps, schema_editor):
+    """Store the region of existing facilities' counties."""
+    Facility = apps.get_model("index", "Facility")
+    Facility.objects.update(
+        region=models.Case(
+            *[
+                models.When(county=county, then=models.Value(region))
+                for county, region in counties_to_regions_map.items()
+            ],
+            default=models.Value(""),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0006_weighted_search_vectors"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="facility",
+            name="region",
+            field=models.CharField(
+                choices=[
+                    ("COAST", "Coast"),
+                    ("NORTH_EASTERN", "North Eastern"),
+                    ("EASTERN", "Eastern"),
+                    ("CENTRAL", "Central"),
+                    ("RIFT_VALLEY", "Rift Valley"),
+                    ("NYANZA", "Nyanza"),
+                    ("NAIROBI", "Nairobi"),
+                ],
+                default="",
+                editable=False,
+                max_length=32,
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_regions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="facility",
+            index=models.Index(
+                fields=["region", "name", "uuid"], name="facility_region_name_uuid_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="facility",
+            index=models.Index(
+                fields=["county", "name", "uuid"], name="facility_county_name_uuid_idx"
+            ),
+        ),
+    ]
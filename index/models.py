@@ -1,7 +1,9 @@
 """This module houses models for the facility app."""
 
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -14,12 +16,12 @@ from common.constants import (
     VISIT_TYPES,
     counties_to_regions_map,
 )
-from common.models import BaseModel, Entity
+from common.models import BaseModel, Entity, Searchable
 
 # Health Facility
 
 
-class Facility(Entity):
+class Facility(Searchable, Entity):
     """Facility model."""
 
     REGIONS = BaseModel.preprocess_choices(REGIONS)
@@ -37,11 +39,15 @@ class Facility(Entity):
     ]
 
     name = models.CharField(max_length=128)
+    # stored (rather than derived from county) so facilities can be filtered & counted by it
+    region = models.CharField(choices=REGIONS, max_length=32, editable=False)
     county = models.CharField(choices=COUNTIES, max_length=32)
     location = models.TextField()  # Detailed Location
     type = models.CharField(choices=FACILITY_TYPES, max_length=32)
     api_base_url = models.URLField("API Base URL")
 
+    SEARCH_FIELDS = {"name": "A", "location": "B", "county": "B"}
+    FACET_FIELDS = ["region", "county", "type"]
     SERIALIZATION_FIELDS = [
         "uuid",
         "name",
@@ -57,10 +63,26 @@ class Facility(Entity):
         "is_active",
     ]
 
-    @property
-    def region(self):
-        """Return the region the facility's county belongs to."""
-        return counties_to_regions_map[self.county]
+    class Meta:  # noqa
+        # keyset pagination (see common.utils.Page)
+        indexes = [
+            models.Index(fields=["name", "uuid"], name="facility_name_uuid_idx"),
+            GinIndex(fields=["search_vector"], name="facility_search_idx"),
+            models.Index(
+                fields=["region", "name", "uuid"], name="facility_region_name_uuid_idx"
+            ),
+            models.Index(
+                fields=["county", "name", "uuid"], name="facility_county_name_uuid_idx"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Save the facility with the region of its county."""
+        self.region = counties_to_regions_map.get(self.county, "")
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "county" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "region"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """Return the string representation of the Facility."""
@@ -70,7 +92,7 @@ class Facility(Entity):
 # Practitioner
 
 
-class Practitioner(BaseModel):
+class Practitioner(Searchable, BaseModel):
     """Practitioner model."""
 
     PRACTITIONER_TYPES = BaseModel.preprocess_choices(PRACTITIONER_TYPES)
@@ -79,7 +101,20 @@ class Practitioner(BaseModel):
     type = models.CharField(choices=PRACTITIONER_TYPES, max_length=32)
 
     VALIDATION_FIELDS = ["user_id", "type"]
+    SEARCH_FIELDS = {"user__first_name": "A", "user__last_name": "A"}
+    SEARCH_DEPENDENCIES = ["authentication.User", "index.Tenure", "index.Facility"]
+    FUZZY_FIELDS = ["user__first_name", "user__last_name"]
+    PHONETIC_KEYS_FIELD = "user__phonetic_keys"
     SERIALIZATION_FIELDS = ["uuid", "user", "type", "latest_tenure", "created"]
+    SERIALIZATION_PREFETCH = {"latest_tenure": ["employment_history__facility"]}
+
+    class Meta:  # noqa
+        indexes = [
+            models.Index(
+                fields=["created", "uuid"], name="practitioner_created_uuid_idx"
+            ),
+            GinIndex(fields=["search_vector"], name="practitioner_search_idx"),
+        ]
 
     def __str__(self):
         """Return the string representation of the Practitioner."""
@@ -87,11 +122,23 @@ class Practitioner(BaseModel):
 
     @property
     def latest_tenure(self):
-        tenure = self.employment_history.latest("start")
+        """Return the practitioner's most recent Tenure (uses prefetched tenures if any)."""
+        # Tenure.Meta.ordering is ["-start"] so the first row is the latest one
+        tenures = self.employment_history.all()
+        if len(tenures) == 0:
+            return None
+        tenure = tenures[0]
         tenure.SERIALIZATION_FIELDS = ["uuid", "facility", "start", "end"]
         return tenure.serialize()
 
 
+@receiver(models.signals.post_save, sender=User, dispatch_uid="update_practitioner_search")
+def update_practitioner_search_vector(sender, instance, update_fields, **kwargs):
+    """Keep the search vector of a practitioner in sync with their user's name."""
+    if update_fields is None or {"first_name", "last_name"} & set(update_fields):
+        Practitioner.update_search_vectors(Practitioner.objects.filter(user=instance))
+
+
 class Tenure(BaseModel):
     """Tenure model."""
 
@@ -126,6 +173,10 @@ class Record(BaseModel):
     visit_type = models.CharField(choices=VISIT_TYPES, max_length=16)
     # doctrine of professional discretion
     is_released = models.BooleanField(default=True)
+    # running rating aggregates (see update_record_rating_aggregates)
+    rating_count = models.PositiveIntegerField(default=0)
+    accuracy_sum = models.PositiveIntegerField(default=0)
+    completeness_sum = models.PositiveIntegerField(default=0)
 
     POST_REQUIRED_FIELDS = [
         "uuid",
@@ -148,16 +199,43 @@ class Record(BaseModel):
         "access_logs",
     ]
 
+    class Meta:  # noqa
+        indexes = [
+            models.Index(
+                fields=["patient", "created", "uuid"], name="record_patient_created_idx"
+            )
+        ]
+
     @property
     def rating(self):
         """Calculate the average rating for this record."""
-        avg_accuracy = (
-            self.ratings.aggregate(models.Avg("accuracy"))["accuracy__avg"] or 0
+        if self.rating_count == 0:
+            return "0,0"
+        avg_accuracy = self.accuracy_sum / self.rating_count
+        avg_completeness = self.completeness_sum / self.rating_count
+        return f"{avg_accuracy},{avg_completeness}"
+
+    @classmethod
+    def recompute_ratings(cls, queryset=None):
+        """Recompute the rating aggregates of the records in *queryset* in one UPDATE."""
+        if queryset is None:
+            queryset = cls.objects.all()
+        ratings = (
+            RecordRating.objects.filter(record=models.OuterRef("pk"))
+            .order_by()
+            .values("record")
         )
-        avg_completeness = (
-            self.ratings.aggregate(models.Avg("completeness"))["completeness__avg"] or 0
+
+        def aggregate(expression):
+            return Coalesce(
+                models.Subquery(ratings.annotate(value=expression).values("value")), 0
+            )
+
+        return queryset.update(
+            rating_count=aggregate(models.Count("uuid")),
+            accuracy_sum=aggregate(models.Sum("accuracy")),
+            completeness_sum=aggregate(models.Sum("completeness")),
         )
-        return f"{avg_accuracy},{avg_completeness}"
 
 
 class RecordRating(BaseModel):
@@ -193,6 +271,21 @@ class RecordRating(BaseModel):
     ]
 
 
+@receiver(
+    models.signals.post_save,
+    sender=RecordRating,
+    dispatch_uid="update_record_rating_aggregates",
+)
+def update_record_rating_aggregates(sender, instance, created, **kwargs):
+    """Add a new RecordRating to its Record's rating aggregates."""
+    if created:
+        Record.objects.filter(uuid=instance.record_id).update(
+            rating_count=models.F("rating_count") + 1,
+            accuracy_sum=models.F("accuracy_sum") + int(instance.accuracy),
+            completeness_sum=models.F("completeness_sum") + int(instance.completeness),
+        )
+
+
 class ConsentRequest(BaseModel):
     """ConsentRequest model."""
 
@@ -223,6 +316,16 @@ class ConsentRequest(BaseModel):
         "transition_logs",
     ]
 
+    class Meta:  # noqa
+        indexes = [
+            models.Index(fields=["created", "uuid"], name="consent_created_uuid_idx"),
+            # access status lookups (see index.views.list_records)
+            models.Index(
+                fields=["record", "requestor", "status"],
+                name="consent_record_requestor_idx",
+            ),
+        ]
+
 
 class ConsentRequestTransition(BaseModel):
     """ConsentRequestTransition model."""
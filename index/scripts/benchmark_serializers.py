@@ -0,0 +1,67 @@
+"""Script to benchmark the compiled serializers against generic serialization."""
+
+import timeit
+
+from django.db import transaction
+from django.utils import timezone
+from model_bakery import baker
+
+from authentication.models import User
+from common.serializers import get_serializer, serialize_value
+from facility.models import LOINC
+from index.models import Facility, Record
+
+ROWS = 10000
+REPEAT = 5
+
+
+def serialize_generic(obj, fields):
+    """Serialize obj the way BaseModel.serialize did before serializers were compiled."""
+    return {field: serialize_value(getattr(obj, field)) for field in fields}
+
+
+def benchmark(label, objects, fields):
+    """Print the best-of-REPEAT time taken to serialize *objects* both ways."""
+    serializer = get_serializer(type(objects[0]), fields)
+    assert [serializer(obj) for obj in objects[:10]] == [
+        serialize_generic(obj, fields) for obj in objects[:10]
+    ]
+
+    generic = min(
+        timeit.repeat(
+            lambda: [serialize_generic(obj, fields) for obj in objects],
+            number=1,
+            repeat=REPEAT,
+        )
+    )
+    compiled = min(
+        timeit.repeat(
+            lambda: [serializer(obj) for obj in objects], number=1, repeat=REPEAT
+        )
+    )
+    print(
+        f"{label:>8} x {len(objects)}: generic {generic * 1000:7.1f} ms, "
+        f"compiled {compiled * 1000:7.1f} ms ({generic / compiled:.1f}x)"
+    )
+
+
+def run():
+    """Run the benchmark_serializers script (the sample rows are rolled back)."""
+    with transaction.atomic():
+        LOINC.objects.bulk_create(baker.prepare(LOINC, _quantity=ROWS))
+        facility = baker.make(Facility)
+        patient = baker.make(User)
+        Record.objects.bulk_create(
+            baker.prepare(
+                Record,
+                facility=facility,
+                patient=patient,
+                creation_time=timezone.now(),
+                _quantity=ROWS,
+            )
+        )
+
+        benchmark("LOINC", list(LOINC.serializable()), LOINC.SERIALIZATION_FIELDS)
+        benchmark("Record", list(Record.serializable()), Record.SERIALIZATION_FIELDS)
+
+        transaction.set_rollback(True)
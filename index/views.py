@@ -3,6 +3,7 @@
 import uuid
 from datetime import timedelta
 
+from django.db.models import Exists, OuterRef, Subquery
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
@@ -11,7 +12,13 @@ from django.views.decorators.http import require_GET, require_POST
 from authentication.models import User
 from common.middleware import require_roles, require_service
 from common.payload import create_error_payload, create_success_payload
-from common.utils import create, search_table, validate_post_data
+from common.utils import (
+    create,
+    paginate,
+    retrieve,
+    search_table,
+    validate_post_data,
+)
 
 from .models import (
     AccessLog,
@@ -30,9 +37,8 @@ from .models import (
 @require_GET
 @require_service("INDEX")
 def list_facilities(request):
-    """List all registered facilities."""
-    facilities = Facility.objects.all().order_by("name")
-    return create_success_payload([facility.serialize() for facility in facilities])
+    """List registered facilities (filterable by region, county & type, with facets)."""
+    return paginate(Facility.objects.all(), ["name", "uuid"], request)
 
 
 @require_roles(["PATIENT", "PRACTITIONER"])
@@ -40,8 +46,8 @@ def list_facilities(request):
 @require_POST
 @require_service("INDEX")
 def search_facilities(request):
-    """Search practitioners."""
-    return search_table(Facility, ["name", "location", "county"], request)
+    """Search facilities (filterable by region, county & type, with facets)."""
+    return search_table(Facility, request)
 
 
 # Practitioner
@@ -61,8 +67,7 @@ def register_practitioner(request):
 @require_service("INDEX")
 def get_practitioner(request, user_id):
     """GET a practitioner."""
-    practitioner = get_object_or_404(Practitioner, user__uuid=user_id)
-    return create_success_payload(practitioner.serialize())
+    return retrieve(Practitioner, request, user__uuid=user_id)
 
 
 @require_roles(["PATIENT", "PRACTITIONER"])
@@ -70,10 +75,7 @@ def get_practitioner(request, user_id):
 @require_service("INDEX")
 def list_practitioners(request):
     """List all registered practitioners."""
-    practitioners = Practitioner.objects.all()
-    return create_success_payload(
-        [practitioner.serialize() for practitioner in practitioners]
-    )
+    return paginate(Practitioner.objects.all(), ["-created", "-uuid"], request)
 
 
 @require_roles(["PATIENT", "PRACTITIONER"])
@@ -82,7 +84,7 @@ def list_practitioners(request):
 @require_service("INDEX")
 def search_practitioners(request):
     """Search for practitioners."""
-    return search_table(Practitioner, ["user__first_name", "user__last_name"], request)
+    return search_table(Practitioner, request)
 
 
 # Records
@@ -111,8 +113,7 @@ def create_rating(request):
 @require_service("INDEX")
 def get_record(request, doc_id):
     """GET a record."""
-    record = get_object_or_404(Record, uuid=doc_id)
-    return create_success_payload(record.serialize())
+    return retrieve(Record, request, uuid=doc_id)
 
 
 @require_roles(["PATIENT", "PRACTITIONER"])
@@ -120,30 +121,33 @@ def get_record(request, doc_id):
 @require_service("INDEX")
 def list_records(request, user_id):
     """List all records belonging to a particular user."""
-    records = list(
-        map(
-            lambda x: x.serialize(),
-            Record.objects.filter(patient=user_id).order_by("-created"),
-        )
-    )
+    records = Record.objects.filter(patient=user_id)
 
     if "PRACTITIONER" in request.token["roles"]:
-        tenure = Tenure.objects.get(practitioner__user=request.token["sub"])
-        for record in records:
-            cnr_q = ConsentRequest.objects.filter(
-                record=record["uuid"],
-                requestor=tenure,
-            )
-            if cnr_q.filter(status="APPROVED").exists():
-                record["access_status"] = "APPROVED"
-            elif cnr_q.filter(status="PENDING").exists():
-                record["access_status"] = "PENDING"
-            else:
-                record["access_status"] = "NONE"
+        # resolved in the same query as the records themselves, through the requests made
+        # under the practitioner's (latest) tenure, ended or not
+        tenure = Tenure.objects.filter(practitioner__user=request.token["sub"])
+        consent_requests = ConsentRequest.objects.filter(
+            record=OuterRef("pk"), requestor=Subquery(tenure.values("uuid")[:1])
+        )
+        records = records.annotate(
+            is_approved=Exists(consent_requests.filter(status="APPROVED")),
+            is_pending=Exists(consent_requests.filter(status="PENDING")),
+        )
+
+        def access_status(record):
+            if record.is_approved:
+                return {"access_status": "APPROVED"}
+            elif record.is_pending:
+                return {"access_status": "PENDING"}
+            return {"access_status": "NONE"}
+
     else:
-        for record in records:
-            record["access_status"] = "APPROVED"
-    return create_success_payload(records)
+
+        def access_status(record):
+            return {"access_status": "APPROVED"}
+
+    return paginate(records, ["-created", "-uuid"], request, access_status)
 
 
 # Consent
@@ -181,10 +185,8 @@ def update_consent_request(request, request_id):
 @require_service("INDEX")
 def list_user_consent_requests(request, user_id):
     """List all the ConsentRequests that a user has received."""
-    requests = ConsentRequest.objects.filter(record__patient=user_id).order_by(
-        "-created"
-    )
-    return create_success_payload([request.serialize() for request in requests])
+    requests = ConsentRequest.objects.filter(record__patient=user_id)
+    return paginate(requests, ["-created", "-uuid"], request)
 
 
 # Access Logs
@@ -228,9 +230,5 @@ def create_access_log(request):
 @require_POST
 @require_service("INDEX")
 def search_patients(request):
-    """Search patients."""
-    return search_table(
-        User,
-        ["first_name", "last_name", "national_id", "email", "phone_number"],
-        request,
-    )
+    """Search patients (by name, or exactly by national ID, phone number or email)."""
+    return search_table(User, request)
@@ -0,0 +1,21 @@
+"""Test authentication management commands."""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from authentication.models import User
+
+
+@pytest.mark.django_db
+def test_backfill_phonetic_keys(patient_fixture):
+    """Test backfill_phonetic_keys management command."""
+    User.objects.filter(pk=patient_fixture.pk).update(phonetic_keys=[])
+    out = StringIO()
+
+    call_command("backfill_phonetic_keys", "--batch-size", "1", stdout=out)
+
+    patient_fixture.refresh_from_db()
+    assert patient_fixture.phonetic_keys == ["D000", "J500"]
+    assert "Updated the phonetic keys of 1 users." in out.getvalue()
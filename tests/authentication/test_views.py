@@ -1,12 +1,17 @@
 """Tests for authentication views."""
 
 import json
-import os
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
 
-import jwt
 import pytest
 from django.test import Client
 
+from authentication import passwords
+from authentication.models import User
+from common.middleware import decode_token
+from index.models import Tenure
+
 
 def test_user_registration_endpoint_missing_fields() -> None:
     """Test user registration using missng fields."""
@@ -109,11 +114,7 @@ def test_patient_login(patient_fixture):
     )
     response_json = json.loads(response.content)
     assert response_json["status"] == "success"
-    decoded_token = jwt.decode(
-        response_json["data"]["token"],
-        os.environ["JWT_PUBLIC_KEY"],
-        algorithms=["RS384"],
-    )
+    decoded_token = decode_token(response_json["data"]["token"])
     assert decoded_token["sub"] == patient_fixture.uuid
     assert decoded_token["roles"] == "PATIENT"
     assert response_json["data"]["user"] == patient_fixture.serialize()
@@ -133,10 +134,116 @@ def test_physician_login_roles(doctor_fixture, practitioner_fixture):
     )
     response_json = json.loads(response.content)
     assert response_json["status"] == "success"
-    decoded_token = jwt.decode(
-        response_json["data"]["token"],
-        os.environ["JWT_PUBLIC_KEY"],
-        algorithms=["RS384"],
-    )
+    decoded_token = decode_token(response_json["data"]["token"])
     assert decoded_token["sub"] == doctor_fixture.uuid
     assert decoded_token["roles"] == "PATIENT PRACTITIONER PHYSICIAN"
+
+
+@pytest.mark.django_db
+def test_practitioner_login_claims(django_assert_num_queries, tenure_fixture):
+    """Test that practitioners' tokens carry their current tenure & facility."""
+    tenure = Tenure.objects.create(
+        practitioner=tenure_fixture.practitioner,
+        facility=tenure_fixture.facility,
+        start="2014-01-01",
+    )
+    client = Client()
+    with django_assert_num_queries(2):  # the user (with roles & tenure) & its relatives
+        response = client.post(
+            "/api/auth/login/",
+            {"email": "jane@example.com", "password": "some-password"},
+            content_type="application/json",
+        )
+    claims = decode_token(json.loads(response.content)["data"]["token"])
+
+    assert claims["roles"] == "PATIENT PRACTITIONER PHYSICIAN"
+    assert claims["tenure"] == str(tenure.uuid)
+    assert claims["facility"] == str(tenure.facility_id)
+
+
+@pytest.mark.django_db
+def test_login_broken_pool(patient_fixture):
+    """Test that logins get a 503 & a new pool after a pool process died."""
+    broken = mock.Mock(**{"submit.side_effect": BrokenProcessPool()})
+    client = Client()
+    with mock.patch.object(passwords, "_executor", broken):
+        response = client.post(
+            "/api/auth/login/",
+            {"email": patient_fixture.email, "password": "some-password"},
+            content_type="application/json",
+        )
+        assert response.status_code == 503
+        assert passwords._executor is None
+        broken.shutdown.assert_called_once_with(wait=False)
+
+
+@pytest.mark.django_db
+def test_revoke_token(patient_auth_token_fixture, doctor_auth_token_fixture):
+    """Test that revoked tokens are rejected & that users can only revoke their own."""
+    client = Client()
+    response = client.post(
+        "/api/auth/revoke/",
+        {"token": doctor_auth_token_fixture},
+        HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+        content_type="application/json",
+    )
+    assert response.status_code == 403
+
+    response = client.post(
+        "/api/auth/revoke/",
+        {"token": 5},
+        HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+        content_type="application/json",
+    )
+    assert json.loads(response.content)["message"] == "Invalid token."
+
+    response = client.post(
+        "/api/auth/revoke/",
+        {},
+        HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+        content_type="application/json",
+    )
+    assert json.loads(response.content)["message"] == "Token revoked."
+
+    response = client.get(
+        "/api/index/facilities/", HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}"
+    )
+    assert response.status_code == 401
+    response = client.post(
+        "/api/auth/revoke/",
+        {"token": doctor_auth_token_fixture},
+        HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_revoke_user_tokens(
+    patient_fixture, doctor_fixture, patient_auth_token_fixture, doctor_auth_token_fixture
+):
+    """Test that superusers can revoke all the tokens a user has been issued."""
+    client = Client()
+
+    def revoke(token):
+        return client.post(
+            f"/api/auth/revoke/users/{patient_fixture.uuid}/",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+            content_type="application/json",
+        )
+
+    def list_facilities(token):
+        return client.get("/api/index/facilities/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    assert revoke(patient_auth_token_fixture).status_code == 403
+    User.objects.filter(uuid=doctor_fixture.uuid).update(is_superuser=True)
+    assert revoke(doctor_auth_token_fixture).json()["message"] == "Tokens revoked."
+    assert list_facilities(patient_auth_token_fixture).status_code == 401
+
+    # tokens issued after the cutoff are valid
+    response = client.post(
+        "/api/auth/login/",
+        {"email": patient_fixture.email, "password": "some-password"},
+        content_type="application/json",
+    )
+    assert list_facilities(response.json()["data"]["token"]).status_code == 200
@@ -0,0 +1,15 @@
+"""Tests for the Bloom filter."""
+
+from common.bloom import BloomFilter
+
+
+def test_bloom_filter():
+    """Test that added items are found & others rarely are."""
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"added-{i}")
+
+    assert all(f"added-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300  # ~100 expected
+    assert len(bloom) == 1000
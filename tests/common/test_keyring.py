@@ -0,0 +1,87 @@
+"""Tests for the JWT key ring."""
+
+import os
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from common.keyring import KeyRing
+
+
+def write_key_pair(directory, kid, mtime, key=None):
+    """Write a (new RSA) key pair with *kid* to *directory*."""
+    if key is None:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_path = directory / f"{kid}.key"
+    private_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    (directory / f"{kid}.key.pub").write_bytes(
+        key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    )
+    os.utime(private_path, (mtime, mtime))
+
+
+def test_keyring_rotation(settings, tmp_path):
+    """Test that keys are picked up, activated & dropped as their files change."""
+    settings.JWT_KEY_DIR = str(tmp_path)
+    settings.JWT_KEY_RELOAD_INTERVAL = 0
+    write_key_pair(tmp_path, "2022-01", 1000)
+    keyring = KeyRing()
+
+    kid, algorithm, _ = keyring.signing_key()
+    assert (kid, algorithm) == ("2022-01", "RS384")
+    assert keyring.public_key("2023-01") is None
+
+    write_key_pair(tmp_path, "2023-01", 2000)
+    kid, _, _ = keyring.signing_key()
+    assert kid == "2023-01"
+    assert keyring.public_key("2022-01") is not None
+    assert keyring.version == 2
+
+    os.remove(tmp_path / "2022-01.key")
+    os.remove(tmp_path / "2022-01.key.pub")
+    assert keyring.public_key("2022-01") is None
+    assert keyring.public_key("2023-01") is not None
+
+
+def test_keyring_algorithms(settings, tmp_path):
+    """Test that keys are used with their type's algorithm, if it's accepted."""
+    settings.JWT_KEY_DIR = str(tmp_path)
+    settings.JWT_KEY_RELOAD_INTERVAL = 0
+    settings.JWT_ALGORITHMS = ["RS384", "EdDSA"]
+    write_key_pair(tmp_path, "rsa", 1000)
+    write_key_pair(tmp_path, "ed25519", 2000, ed25519.Ed25519PrivateKey.generate())
+    keyring = KeyRing()
+
+    kid, algorithm, key = keyring.signing_key()
+    assert (kid, algorithm) == ("ed25519", "EdDSA")
+    token = jwt.encode({"sub": "someone"}, key, algorithm=algorithm)
+    algorithm, key = keyring.public_key(kid)
+    assert jwt.decode(token, key, algorithms=[algorithm]) == {"sub": "someone"}
+    assert keyring.public_key("rsa")[0] == "RS384"
+
+    settings.JWT_ALGORITHMS = ["RS384"]
+    assert KeyRing().public_key("ed25519") is None
+
+
+def test_keyring_unreadable_keys(settings, tmp_path):
+    """Test that unreadable keys are skipped & failed reloads keep the loaded keys."""
+    settings.JWT_KEY_DIR = str(tmp_path)
+    settings.JWT_KEY_RELOAD_INTERVAL = 0
+    write_key_pair(tmp_path, "2022-01", 1000)
+    (tmp_path / "2023-01.key.pub").write_bytes(b"-----BEGIN PUBLIC KEY-----\nMIIB")
+    keyring = KeyRing()
+
+    assert keyring.signing_key()[0] == "2022-01"
+    assert keyring.public_key("2023-01") is None
+
+    settings.JWT_KEY_DIR = str(tmp_path / "missing")
+    assert keyring.public_key("2022-01") is not None
@@ -0,0 +1,48 @@
+"""Tests for common middleware."""
+
+import time
+from unittest import mock
+
+import jwt
+import pytest
+from django.test import Client
+
+from common.keyring import keyring
+from common.middleware import decode_token, verified_claims
+
+
+def test_decode_token_cache():
+    """Test that tokens are verified once, until they expire."""
+    verified_claims.clear()
+    claims = {"sub": "someone", "exp": time.time() + 60, "roles": "PATIENT"}
+    _, algorithm, key = keyring.signing_key()
+    token = jwt.encode(claims, key, algorithm=algorithm)
+
+    with mock.patch("common.middleware.jwt.decode", wraps=jwt.decode) as decode:
+        assert decode_token(token) == {**claims, "raw": token}
+        assert decode_token(token) == {**claims, "raw": token}
+        assert decode.call_count == 1
+
+        # the cached claims expire with the token
+        later = time.monotonic() + 61
+        with mock.patch("common.cache.time.monotonic", return_value=later):
+            decode_token(token)
+        assert decode.call_count == 2
+    verified_claims.clear()
+
+
+@pytest.mark.django_db
+def test_invalid_tokens_are_unauthorized():
+    """Test that expired, misused & role-less tokens are rejected with a 401."""
+    kid, algorithm, key = keyring.signing_key()
+    claims = {"sub": "someone", "exp": time.time() + 60, "roles": "PATIENT"}
+    tokens = [
+        jwt.encode({**claims, "exp": time.time() - 60}, key, algorithm, {"kid": kid}),
+        jwt.encode(claims, key, "RS256", {"kid": kid}),
+        jwt.encode({"sub": "someone"}, key, algorithm, {"kid": kid}),
+    ]
+
+    client = Client()
+    for token in tokens:
+        response = client.get("/api/index/facilities/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        assert response.status_code == 401
@@ -0,0 +1,37 @@
+"""Tests for common payloads."""
+
+import json
+
+import pytest
+from model_bakery import baker
+
+from common.payload import create_streaming_success_payload
+from index.models import Facility
+
+
+@pytest.mark.django_db
+def test_streaming_success_payload():
+    """Test that streamed payloads match the regular envelope across chunks."""
+    baker.make(Facility, _quantity=5)
+    facilities = Facility.objects.order_by("name")
+
+    response = create_streaming_success_payload(facilities, chunk_size=2)
+
+    assert response["Content-Type"] == "application/json"
+    assert json.loads(b"".join(response.streaming_content)) == {
+        "status": "success",
+        "data": [facility.serialize() for facility in facilities],
+        "message": "",
+    }
+
+
+@pytest.mark.django_db
+def test_streaming_success_payload_empty():
+    """Test streaming a payload with no rows."""
+    response = create_streaming_success_payload(Facility.objects.all())
+
+    assert json.loads(b"".join(response.streaming_content)) == {
+        "status": "success",
+        "data": [],
+        "message": "",
+    }
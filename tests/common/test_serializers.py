@@ -0,0 +1,26 @@
+"""Tests for common serializers."""
+
+import pytest
+from model_bakery import baker
+
+from common.serializers import get_serializer, serialize_value
+from facility.models import ChargeItem
+
+
+@pytest.mark.django_db
+def test_compiled_serializer_matches_generic():
+    """Test that compiled serializers convert UUIDs, datetimes & Decimals like str()."""
+    charge_item = baker.make(ChargeItem, unit_price="1500.50")
+    charge_item.refresh_from_db()
+
+    serialized = get_serializer(ChargeItem, ChargeItem.SERIALIZATION_FIELDS)(
+        charge_item
+    )
+    assert serialized == {
+        field: serialize_value(getattr(charge_item, field))
+        for field in ChargeItem.SERIALIZATION_FIELDS
+    }
+    assert serialized["unit_price"] == "1500.50"
+    assert serialized["encounter_id"] == str(charge_item.encounter_id)
+    assert serialized["created"] == str(charge_item.created)
+    assert serialized["item"] == charge_item.item.serialize()
@@ -0,0 +1,26 @@
+"""Tests for the project URLs."""
+
+import importlib
+
+import pytest
+from django.urls import Resolver404, clear_url_caches, get_resolver
+
+import config.urls
+
+
+def test_only_enabled_services_are_routed(settings):
+    """Test that the URLs of services this server doesn't provide aren't mounted."""
+    services = settings.SERVER_SERVICES
+    settings.SERVER_SERVICES = frozenset({"INDEX"})
+    try:
+        resolver = get_resolver(importlib.reload(config.urls))
+        assert resolver.resolve("/api/index/facilities/").func.__name__ == "list_facilities"
+        assert resolver.resolve("/api/search/cache/").func.__name__ == "get_search_cache_stats"
+        with pytest.raises(Resolver404):
+            resolver.resolve("/api/auth/login/")
+        with pytest.raises(Resolver404):
+            resolver.resolve("/api/facility/icd10/search/")
+    finally:
+        settings.SERVER_SERVICES = services
+        importlib.reload(config.urls)
+        clear_url_caches()
@@ -6,8 +6,15 @@ import pytest
 from django.test import Client
 
 from authentication.models import User
+from common.search_cache import search_results
 from index.models import Facility, Practitioner, Tenure
 
+
+@pytest.fixture(autouse=True)
+def clear_search_results():
+    """Empty the search result cache, rows cached by a test are rolled back after it."""
+    search_results.clear()
+
 # authentication app
 
 
@@ -0,0 +1,131 @@
+"""Tests for the in-memory terminology search index."""
+
+import json
+import time
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from common.search_cache import search_results
+from facility.models import HCPCS, TerminologyVersion
+from facility.search_index import (BUILD_RETRY_INTERVAL, TableIndex,
+                                   TerminologySearchIndex, terminology_index)
+from facility.terminology import get_snapshot
+
+
+@pytest.mark.django_db
+def test_search_index(
+    settings, practitioner_fixture, doctor_auth_token_fixture, django_assert_num_queries
+):
+    """Test that coding table searches are served from memory, like from Postgres."""
+    settings.TERMINOLOGY_VERSION_CHECK_INTERVAL = 0
+    TerminologyVersion.bump()
+    HCPCS.objects.create(code="99241", description="Office consultation", status_code="I")
+    HCPCS.objects.create(code="99251", description="Inpatient consultation", status_code="I")
+    HCPCS.objects.create(code="99281", description="Emergency dept visit", status_code="A")
+
+    client = Client()
+
+    def search(query, **params):
+        response = client.post(
+            "/api/facility/hcpcs/search/",
+            {"query": query, **params},
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+            content_type="application/json",
+        )
+        return json.loads(response.content)
+
+    from_db = [search("consultations"), search("99241"), search("office consultation")]
+
+    settings.TERMINOLOGY_SEARCH_INDEX = True
+    terminology_index.build()
+    settings.TERMINOLOGY_VERSION_CHECK_INTERVAL = 30
+    with django_assert_num_queries(0):
+        from_memory = [search("consultation"), search("99241"), search("office consultation")]
+    # plurals aren't in the vocabulary, Postgres is asked for their lexemes once
+    assert search("consultations") == from_memory[0]
+    assert [r["data"] for r in from_memory] == [r["data"] for r in from_db]
+    assert [r["hits"] for r in from_memory] == [r["hits"] for r in from_db]
+
+    first_page = search("consultation", limit=1)
+    second_page = search("consultation", limit=1, cursor=first_page["next_cursor"])
+    assert first_page["data"] + second_page["data"] == from_memory[0]["data"]
+    assert second_page["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_search_index_cursors(settings, practitioner_fixture, doctor_auth_token_fixture):
+    """Test that searches are paged through by the source (memory or Postgres) they began on."""
+    settings.TERMINOLOGY_VERSION_CHECK_INTERVAL = 0
+    TerminologyVersion.bump()
+    HCPCS.objects.create(code="99241", description="Office consultation", status_code="I")
+    HCPCS.objects.create(code="99251", description="Inpatient consultation", status_code="I")
+
+    client = Client()
+
+    def search(**params):
+        response = client.post(
+            "/api/facility/hcpcs/search/",
+            {"query": "consultation", "limit": 1, **params},
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+            content_type="application/json",
+        )
+        return json.loads(response.content)
+
+    db_page = search()
+    settings.TERMINOLOGY_SEARCH_INDEX = True
+    terminology_index.build()
+    settings.TERMINOLOGY_VERSION_CHECK_INTERVAL = 30
+    search_results.clear()
+    memory_page = search()
+
+    # a Postgres cursor is continued by Postgres (& vice versa) once the index is ready
+    pages = [db_page, search(cursor=db_page["next_cursor"])]
+    assert {row["code"] for page in pages for row in page["data"]} == {"99241", "99251"}
+    assert pages[1]["next_cursor"] is None
+    # ... and rejected instead of restarting the search while it isn't
+    settings.TERMINOLOGY_SEARCH_INDEX = False
+    assert search(cursor=memory_page["next_cursor"]) == {
+        "status": "error",
+        "data": {},
+        "message": "Expired cursor, please restart the search.",
+    }
+
+
+def test_search_index_build_retry():
+    """Test that failed builds of the index are only retried after BUILD_RETRY_INTERVAL."""
+    index = TerminologySearchIndex()
+    with mock.patch.object(index, "build", side_effect=RuntimeError), mock.patch(
+        "facility.search_index.current_version", return_value=1
+    ), mock.patch(  # build synchronously
+        "facility.search_index.threading.Thread",
+        side_effect=lambda target, daemon: mock.Mock(start=target),
+    ):
+        assert index.get_state() is None
+        assert index.get_state() is None
+        assert index.build.call_count == 1
+
+        later = time.monotonic() + BUILD_RETRY_INTERVAL
+        with mock.patch("facility.search_index.time.monotonic", return_value=later):
+            index.get_state()
+        assert index.build.call_count == 2
+
+
+@pytest.mark.django_db
+def test_search_index_snapshot_fallback(settings, tmp_path):
+    """Test that rows missing from the snapshot are encoded when the index is loaded."""
+    settings.TERMINOLOGY_SNAPSHOT_PATH = tmp_path / "terminology.snapshot"
+    settings.TERMINOLOGY_VERSION_CHECK_INTERVAL = 0
+    TerminologyVersion.bump()
+    HCPCS.objects.create(code="99241", description="Office consultation")
+    call_command("export_terminology_snapshot", stdout=StringIO())
+    added = HCPCS.objects.create(code="99251", description="Inpatient consultation")
+
+    table = TableIndex(HCPCS).load(set(), get_snapshot())
+    assert table.snapshot is not None
+    fragments = [json.loads(table.fragment(row)) for row in range(len(table.uuids))]
+    assert added.serialize() in fragments
+    assert len(fragments) == 2
@@ -0,0 +1,51 @@
+"""Tests for the terminology snapshot."""
+
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from facility.models import HCPCS, TerminologyVersion
+
+
+@pytest.mark.django_db
+def test_export_terminology_snapshot(
+    settings,
+    tmp_path,
+    practitioner_fixture,
+    doctor_auth_token_fixture,
+    django_assert_num_queries,
+):
+    """Test that exported snapshots serve exact-code lookups without DB queries."""
+    settings.TERMINOLOGY_SNAPSHOT_PATH = tmp_path / "terminology.snapshot"
+    settings.TERMINOLOGY_VERSION_CHECK_INTERVAL = 0
+    consultations = [
+        HCPCS.objects.create(code="99241", description="Office consultation"),
+        HCPCS.objects.create(code="99251", description="Inpatient consultation"),
+    ]
+    TerminologyVersion.bump()
+
+    out = StringIO()
+    call_command("export_terminology_snapshot", stdout=out)
+    assert "Terminology snapshot (version 1) exported" in out.getvalue()
+
+    client = Client()
+    with django_assert_num_queries(1):  # terminology version
+        response = client.get(
+            "/api/facility/hcpcs/consultation-codes/",
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+        )
+    assert json.loads(response.content)["data"] == [
+        consultation.serialize() for consultation in consultations
+    ]
+
+    # snapshots of other terminology versions are ignored
+    HCPCS.objects.filter(code="99251").delete()
+    TerminologyVersion.bump()
+    response = client.get(
+        "/api/facility/hcpcs/consultation-codes/",
+        HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+    )
+    assert json.loads(response.content)["data"] == [consultations[0].serialize()]
@@ -0,0 +1,32 @@
+"""Tests for facility terminology caches."""
+
+import json
+
+import pytest
+from model_bakery import baker
+
+from facility.models import HCPCS, TerminologyVersion
+from facility.terminology import get_serialized_rows
+
+
+@pytest.mark.django_db
+def test_serialized_rows_cache(settings, django_assert_num_queries):
+    """Test that coding table rows are encoded once per terminology version."""
+    settings.TERMINOLOGY_VERSION_CHECK_INTERVAL = 0
+    codes = baker.make(HCPCS, _quantity=3)
+    uuids = [code.uuid for code in reversed(codes)]
+
+    with django_assert_num_queries(2):  # version + rows
+        fragments = get_serialized_rows(HCPCS, uuids)
+    assert [json.loads(fragment) for fragment in fragments] == [
+        code.serialize() for code in reversed(codes)
+    ]
+
+    with django_assert_num_queries(1):  # version
+        assert get_serialized_rows(HCPCS, uuids[:2]) == fragments[:2]
+
+    HCPCS.objects.filter(uuid=uuids[0]).update(description="Updated")
+    TerminologyVersion.bump()
+    with django_assert_num_queries(2):
+        fragments = get_serialized_rows(HCPCS, uuids)
+    assert json.loads(fragments[0])["description"] == "Updated"
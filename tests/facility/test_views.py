@@ -4,8 +4,10 @@ import json
 
 import pytest
 from django.test import Client
+from model_bakery import baker
 
-from facility.models import ICD10, ICD10Category
+from facility.models import (HCPCS, ICD10, ChargeItem, Encounter, ICD10Category,
+                             Observation, Prescription, Visit)
 
 
 @pytest.mark.django_db
@@ -57,3 +59,195 @@ def test_search_icd10(practitioner_fixture, doctor_auth_token_fixture):
     codes = json.loads(response.content)["data"]
 
     assert codes == [cholera_unspecified.serialize()]
+
+
+@pytest.mark.django_db
+def test_search_icd10_ranking(practitioner_fixture, doctor_auth_token_fixture):
+    """Test that search results are ranked, paginated & counted."""
+    fever_cat = ICD10Category.objects.create(code="R50", title="Fever")
+    # matches on the category title only (lowest weight)
+    chills = ICD10.objects.create(code="R509", description="Chills", category=fever_cat)
+    # matches on the description
+    drug_fever = ICD10.objects.create(
+        code="R502", description="Drug induced fever", category=fever_cat
+    )
+
+    client = Client()
+    codes, cursor = [], None
+    for _ in range(2):
+        response_json = json.loads(
+            client.post(
+                "/api/facility/icd10/search/",
+                {"query": "fever", "limit": 1, "cursor": cursor},
+                HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+                content_type="application/json",
+            ).content
+        )
+        assert response_json["hits"] == {"total": 2, "relation": "eq"}
+        codes += [code["code"] for code in response_json["data"]]
+        cursor = response_json["next_cursor"]
+
+    assert codes == [drug_fever.code, chills.code]
+    assert cursor is None
+
+
+@pytest.mark.django_db
+def test_get_visit_query_count(
+    practitioner_fixture, doctor_auth_token_fixture, django_assert_num_queries
+):
+    """Test that a visit is served in a fixed number of queries."""
+    visit = baker.make(Visit, primary_diagnosis=baker.make(ICD10))
+    visit.secondary_diagnoses.add(*baker.make(ICD10, _quantity=3))
+    for encounter in baker.make(Encounter, visit=visit, _quantity=20):
+        baker.make(ChargeItem, encounter=encounter, _quantity=2)
+        baker.make(Observation, encounter=encounter, _quantity=2)
+        baker.make(Prescription, encounter=encounter, _quantity=2)
+
+    client = Client()
+    # visit (+ diagnosis), secondary diagnoses, encounters, services, observations,
+    # prescriptions
+    with django_assert_num_queries(6):
+        response = client.get(
+            f"/api/facility/visits/{visit.uuid}/",
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+        )
+    response_json = json.loads(response.content)
+
+    assert response_json["status"] == "success"
+    assert len(response_json["data"]["encounters"]) == 20
+    assert response_json["data"] == visit.serialize()
+
+
+@pytest.mark.django_db
+def test_autocomplete_icd10(practitioner_fixture, doctor_auth_token_fixture):
+    """Test autocompleting ICD10 codes from code prefixes & misspelled descriptions."""
+    asthma_cat = ICD10Category.objects.create(code="J45", title="Asthma")
+    mild_asthma = ICD10.objects.create(
+        code="J452", description="Mild intermittent asthma", category=asthma_cat
+    )
+    severe_asthma = ICD10.objects.create(
+        code="J455", description="Severe persistent asthma", category=asthma_cat
+    )
+    baker.make(ICD10, code="A009", description="Cholera, unspecified")
+
+    client = Client()
+
+    def autocomplete(query):
+        response = client.get(
+            "/api/facility/icd10/autocomplete/",
+            {"q": query},
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+        )
+        return [code["code"] for code in json.loads(response.content)["data"]]
+
+    assert autocomplete("j45.5") == [severe_asthma.code]
+    assert autocomplete("J4") == [mild_asthma.code, severe_asthma.code]
+    assert sorted(autocomplete("asthama")) == [mild_asthma.code, severe_asthma.code]
+
+
+@pytest.mark.django_db
+def test_resolve_icd10(
+    practitioner_fixture, doctor_auth_token_fixture, django_assert_max_num_queries
+):
+    """Test looking up ICD10s by exact code, one at a time & in bulk."""
+    codes = baker.make(ICD10, code=iter(["A009", "J452", "R502"]), _quantity=3)
+
+    client = Client()
+    response = client.get(
+        "/api/facility/icd10/J45.2/",
+        HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+    )
+    assert json.loads(response.content)["data"] == codes[1].serialize()
+
+    response = client.get(
+        "/api/facility/icd10/Z999/",
+        HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+    )
+    assert response.status_code == 404
+
+    with django_assert_max_num_queries(2):  # terminology version & codes
+        response = client.post(
+            "/api/facility/icd10/resolve/",
+            {"codes": ["R502", "Z999", "a009", "J45.2"]},
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+            content_type="application/json",
+        )
+    response_json = json.loads(response.content)
+    assert response_json["data"] == [
+        codes[2].serialize(),
+        codes[0].serialize(),
+        codes[1].serialize(),
+    ]
+    assert response_json["missing"] == ["Z999"]
+
+
+@pytest.mark.django_db
+def test_search_codings(practitioner_fixture, doctor_auth_token_fixture):
+    """Test running several coding table searches in one request."""
+    fever = baker.make(ICD10, code="R502", description="Drug induced fever")
+    baker.make(HCPCS, code="99241", description="Office consultation")
+
+    client = Client()
+    response_json = json.loads(
+        client.post(
+            "/api/facility/search/",
+            {
+                "searches": [
+                    {"id": "diagnosis", "table": "icd10", "query": "fever"},
+                    {"table": "hcpcs", "query": "consultation", "limit": 1},
+                    {"table": "icd9", "query": "fever"},
+                ]
+            },
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+            content_type="application/json",
+        ).content
+    )
+
+    results = response_json["data"]
+    assert list(results) == ["diagnosis", "1", "2"]
+    assert results["diagnosis"]["data"] == [fever.serialize()]
+    assert results["diagnosis"]["hits"] == {"total": 1, "relation": "eq"}
+    assert [code["code"] for code in results["1"]["data"]] == ["99241"]
+    assert results["2"]["status"] == "error"
+
+    for searches, message in [
+        ([{"id": [1], "table": "icd10", "query": "a"}], "id must be a string or an integer."),
+        ([{"id": "1", "table": "icd10", "query": "a"}, {"table": "icd10"}], "ids must be unique."),
+    ]:
+        response = client.post(
+            "/api/facility/search/",
+            {"searches": searches},
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+            content_type="application/json",
+        )
+        assert response.json() == {"status": "error", "data": {}, "message": message}
+
+
+@pytest.mark.django_db
+def test_search_cache(
+    django_assert_num_queries, tenure_fixture, doctor_auth_token_fixture
+):
+    """Test that repeated searches are cached until a searched model changes."""
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}")
+    clinic_fixture = tenure_fixture.facility
+    body = {"query": clinic_fixture.name}
+
+    response = client.post(
+        "/api/index/facilities/search/", body, content_type="application/json"
+    )
+    assert len(response.json()["data"]) == 1
+    with django_assert_num_queries(0):
+        cached = client.post(
+            "/api/index/facilities/search/", body, content_type="application/json"
+        )
+    assert cached.content == response.content
+
+    clinic_fixture.name = "Renamed Clinic"
+    clinic_fixture.save()
+    response = client.post(
+        "/api/index/facilities/search/", body, content_type="application/json"
+    )
+    assert response.json()["data"] == []
+
+    stats = client.get("/api/search/cache/").json()["data"]
+    assert stats["hits"] == 1 and stats["misses"] == 2
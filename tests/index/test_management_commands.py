@@ -5,6 +5,9 @@ from io import StringIO
 
 import pytest
 from django.core.management import call_command
+from model_bakery import baker
+
+from index.models import Record, RecordRating
 
 
 @pytest.mark.django_db
@@ -44,3 +47,20 @@ def test_register_facility(clinic_default_fields_fixture):
     tc.assertIn(
         f"DETAIL:  Key (email)=({fields['email']}) already exists.", out.getvalue()
     )
+
+
+@pytest.mark.django_db
+def test_recompute_record_ratings(patient_fixture, clinic_fixture):
+    """Test recompute_record_ratings management command."""
+    record = baker.make(Record, patient=patient_fixture, facility=clinic_fixture)
+    baker.make(RecordRating, record=record, accuracy=4, completeness=2, _quantity=2)
+    # simulate aggregates that drifted from the ratings
+    Record.objects.filter(uuid=record.uuid).update(rating_count=0, accuracy_sum=0)
+
+    out = StringIO()
+    call_command("recompute_record_ratings", stdout=out)
+
+    assert "Recomputed the rating aggregates of 1 records." in out.getvalue()
+    record.refresh_from_db()
+    assert (record.rating_count, record.accuracy_sum, record.completeness_sum) == (2, 8, 4)
+    assert record.rating == "4.0,2.0"
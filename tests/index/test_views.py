@@ -3,11 +3,12 @@
 import json
 
 import pytest
+from django.db.models import Q
 from django.test import Client
 from model_bakery import baker
 
 from authentication.models import NextOfKin, User
-from index.models import Facility
+from index.models import ConsentRequest, Facility, Record
 
 
 @pytest.mark.django_db
@@ -17,15 +18,115 @@ def test_list_facilities(patient_auth_token_fixture):
         baker.make(Facility)
 
     client = Client()
-    response_json = json.loads(
-        client.get(
+    response = client.get(
+        "/api/index/facilities/",
+        HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+    )
+    assert response.streaming
+    response_json = json.loads(b"".join(response.streaming_content))
+
+    assert response_json["status"] == "success"
+    assert len(response_json["data"]) == 4
+    assert response_json["message"] == ""
+
+
+@pytest.mark.django_db
+def test_list_facilities_pagination(patient_auth_token_fixture):
+    """Test following next_cursor through all pages of facilities."""
+    for name in ["Bravo", "Alpha", "Charlie", "Alpha", "Delta"]:
+        baker.make(Facility, name=name)
+
+    client = Client()
+    pages, cursor = [], ""
+    while cursor is not None:
+        response = client.get(
             "/api/index/facilities/",
+            {"limit": 2, "cursor": cursor} if cursor else {"limit": 2},
+            HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+        )
+        response_json = json.loads(b"".join(response.streaming_content))
+        pages.append([facility["uuid"] for facility in response_json["data"]])
+        cursor = response_json["next_cursor"]
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == [
+        str(facility.uuid) for facility in Facility.objects.order_by("name", "uuid")
+    ]
+
+    # undecodable & well-formed cursors with values of the wrong types
+    for cursor in ["not-a-cursor", "WyJ4IiwgInkiXQ=="]:
+        response_json = json.loads(
+            client.get(
+                "/api/index/facilities/",
+                {"cursor": cursor},
+                HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+            ).content
+        )
+        assert response_json == {
+            "status": "error",
+            "data": {},
+            "message": "Malformed cursor.",
+        }
+
+    # searches look their (cached) results up before the cursor is validated
+    response_json = json.loads(
+        client.post(
+            "/api/index/facilities/search/",
+            {"query": "clinic", "cursor": "W1sxXSwgIngiXQ=="},  # [[1], "x"]
             HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+            content_type="application/json",
         ).content
     )
+    assert response_json["message"] == "Malformed cursor."
 
-    assert response_json["status"] == "success"
-    assert len(response_json["data"]) == 4
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params, message",
+    [
+        ({"fields": 5}, "fields must be a comma separated list of field names."),
+        ({"fields": True}, "fields must be a comma separated list of field names."),
+        ({"depth": 1.7}, "depth must be an integer."),
+        ({"depth": True}, "depth must be an integer."),
+    ],
+)
+def test_search_facilities_serialization_params(params, message, patient_auth_token_fixture):
+    """Test that mistyped fields & depth parameters of JSON bodies are rejected."""
+    client = Client()
+    response_json = json.loads(
+        client.post(
+            "/api/index/facilities/search/",
+            {"query": "clinic", **params},
+            HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+            content_type="application/json",
+        ).content
+    )
+    assert response_json == {"status": "error", "data": {}, "message": message}
+
+
+@pytest.mark.django_db
+def test_list_facilities_facets(patient_auth_token_fixture):
+    """Test filtering facilities by region & their facet counts."""
+    baker.make(Facility, county="MOMBASA", type="HOSP")
+    baker.make(Facility, county="KILIFI", type="PHARM")
+    baker.make(Facility, county="NYERI", type="HOSP")
+
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}")
+    response = client.get("/api/index/facilities/", {"region": "COAST"})
+    response_json = json.loads(b"".join(response.streaming_content))
+
+    assert {facility["county"] for facility in response_json["data"]} == {
+        "MOMBASA",
+        "KILIFI",
+    }
+    assert response_json["facets"] == {
+        "region": {"COAST": 2},
+        "county": {"MOMBASA": 1, "KILIFI": 1},
+        "type": {"HOSP": 1, "PHARM": 1},
+    }
+
+    response_json = client.get("/api/index/facilities/", {"region": "Coast"}).json()
+    assert response_json["status"] == "error"
 
 
 @pytest.mark.django_db
@@ -69,9 +170,9 @@ def test_register_practitioner(practitioner_fixture, doctor_auth_token_fixture):
         "data": {
             "created": response_json["data"]["created"],
             "uuid": response_json["data"]["uuid"],
-            "user_id": str(user.uuid),
             "user": user.serialize(),
             "type": "PHYSICIAN",
+            "latest_tenure": None,
         },
         "message": "Created successfully.",
     }
@@ -100,4 +201,199 @@ def test_search_patient(
         "status": "success",
         "data": [patient_fixture.serialize()],
         "message": "",
+        "next_cursor": None,
+        "hits": {"total": 1, "relation": "eq"},
+    }
+
+
+@pytest.mark.django_db
+def test_search_patient_by_identifier(
+    practitioner_fixture, doctor_fixture, doctor_auth_token_fixture, patient_fixture
+):
+    """Test that national IDs, phone numbers & emails are looked up exactly."""
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}")
+
+    def search(query):
+        response = client.post(
+            "/api/index/patients/search/", {"query": query}, content_type="application/json"
+        )
+        return json.loads(response.content)["data"]
+
+    assert search("12345") == [patient_fixture.serialize()]
+    assert search("1234") == []
+    # both fixtures share the number, given here in the local format
+    assert {user["uuid"] for user in search("0712 345 678")} == {
+        str(patient_fixture.uuid),
+        str(doctor_fixture.uuid),
+    }
+    assert search("jane@EXAMPLE.com") == [doctor_fixture.serialize()]
+    # dashes are stripped from phone numbers & IDs, but are part of email addresses
+    jane_doe = baker.make(User, email="jane-doe@example.com", national_id="54321")
+    assert User.identifier_filter("jane-doe@example.com") == Q(email=jane_doe.email)
+    assert search("jane-doe@example.com") == [jane_doe.serialize()]
+
+
+@pytest.mark.django_db
+def test_fuzzy_search_patients(
+    practitioner_fixture, doctor_auth_token_fixture, patient_fixture
+):
+    """Test that fuzzy searches match misspelt names, best match first."""
+    baker.make(User, first_name="Jon", last_name="Doh", national_id="54321")
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}")
+
+    response_json = json.loads(
+        client.post(
+            "/api/index/patients/search/",
+            {"query": "Johnn Doe", "fuzzy": True},
+            content_type="application/json",
+        ).content
+    )
+
+    names = [(user["first_name"], user["last_name"]) for user in response_json["data"]]
+    assert names[0] == ("John", "Doe")
+    assert ("Jon", "Doh") in names
+
+
+@pytest.mark.django_db
+def test_search_practitioners_after_rename(practitioner_fixture, doctor_auth_token_fixture):
+    """Test that practitioner search vectors follow changes to their user's name."""
+    user = practitioner_fixture.user
+    user.last_name = "Wanjiru"
+    user.save()
+
+    client = Client()
+    response_json = json.loads(
+        client.post(
+            "/api/index/practitioners/search/",
+            {"query": "Wanjiru"},
+            HTTP_AUTHORIZATION=f"Bearer {doctor_auth_token_fixture}",
+            content_type="application/json",
+        ).content
+    )
+    assert [p["uuid"] for p in response_json["data"]] == [str(practitioner_fixture.uuid)]
+
+
+@pytest.mark.django_db
+def test_get_record_sparse_fields(
+    patient_fixture,
+    patient_auth_token_fixture,
+    tenure_fixture,
+    django_assert_num_queries,
+):
+    """Test the fields & depth parameters of the get record endpoint."""
+    record = baker.make(
+        Record, patient=patient_fixture, facility=tenure_fixture.facility
+    )
+    baker.make(ConsentRequest, record=record, requestor=tenure_fixture)
+
+    client = Client()
+    with django_assert_num_queries(1):  # record + facility
+        response_json = json.loads(
+            client.get(
+                f"/api/index/records/{record.uuid}/",
+                {"fields": "uuid,visit_type,facility.name,facility.county"},
+                HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+            ).content
+        )
+    assert response_json["data"] == {
+        "uuid": str(record.uuid),
+        "visit_type": record.visit_type,
+        "facility": {"name": "Felicity Clinic", "county": "NAIROBI"},
     }
+
+    response_json = json.loads(
+        client.get(
+            f"/api/index/records/{record.uuid}/",
+            {"depth": 0},
+            HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+        ).content
+    )
+    assert response_json["data"] == {
+        "uuid": str(record.uuid),
+        "facility": str(record.facility_id),
+        "patient_id": str(patient_fixture.uuid),
+        "is_released": record.is_released,
+        "creation_time": str(record.creation_time),
+        "visit_type": record.visit_type,
+        "rating": "0,0",
+    }
+
+    response_json = json.loads(
+        client.get(
+            f"/api/index/records/{record.uuid}/",
+            {"depth": 1, "fields": "consent_requests"},
+            HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+        ).content
+    )
+    [consent_request] = response_json["data"]["consent_requests"]
+    assert consent_request["requestor"] == str(tenure_fixture.uuid)
+    assert "transition_logs" not in consent_request
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("record_count", [2, 20])
+@pytest.mark.parametrize("params", [{"fields": "uuid"}, {}])
+def test_list_records_access_status(
+    record_count,
+    params,
+    patient_fixture,
+    tenure_fixture,
+    doctor_auth_token_fixture,
+    django_assert_num_queries,
+):
+    """Test that access statuses are resolved in the same query as the records."""
+    # the practitioner's only tenure has ended, its approved requests still grant access
+    records = baker.make(
+        Record,
+        patient=patient_fixture,
+        facility=tenure_fixture.facility,
+        _quantity=record_count,
+    )
+    baker.make(
+        ConsentRequest, record=records[0], requestor=tenure_fixture, status="APPROVED"
+    )
+    baker.make(
+        ConsentRequest, record=records[-1], requestor=tenure_fixture, status="PENDING"
+    )
+
+    client = Client()
+    url = f"/api/index/records/users/{patient_fixture.uuid}/"
+    auth = f"Bearer {doctor_auth_token_fixture}"
+    client.get(url, params, HTTP_AUTHORIZATION=auth)  # loads the revoked tokens
+    # the full payload prefetches the records' ratings, consent requests, access logs, ...
+    with django_assert_num_queries(1 if params else 8):
+        response = client.get(url, params, HTTP_AUTHORIZATION=auth)
+        response_json = json.loads(b"".join(response.streaming_content))
+
+    statuses = {
+        record["uuid"]: record["access_status"] for record in response_json["data"]
+    }
+    assert len(statuses) == record_count
+    assert statuses[str(records[-1].uuid)] == "PENDING"
+    assert statuses[str(records[0].uuid)] == "APPROVED"
+    assert list(statuses.values()).count("NONE") == record_count - 2
+
+
+@pytest.mark.django_db
+def test_create_rating_updates_aggregates(patient_fixture, patient_auth_token_fixture):
+    """Test that new ratings are added to their record's rating aggregates."""
+    record = baker.make(Record, patient=patient_fixture)
+
+    client = Client()
+    for accuracy, completeness in [(5, 3), (2, 4)]:
+        client.post(
+            "/api/index/records/ratings/new/",
+            {
+                "record_id": str(record.uuid),
+                "rater_id": str(patient_fixture.uuid),
+                "accuracy": accuracy,
+                "completeness": completeness,
+                "review": "ok",
+            },
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {patient_auth_token_fixture}",
+        )
+
+    record.refresh_from_db()
+    assert record.rating_count == 2
+    assert record.rating == "3.5,3.5"